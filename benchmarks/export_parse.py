@@ -0,0 +1,86 @@
+"""
+Measures the peak memory usage and duration of extracting the third-party modules from a large synthetic UBT JSON export,
+comparing the streaming reader against parsing the entire export with `json.loads()`
+"""
+from fake_engine import generateExport
+import argparse, json, os, platform, resource, shutil, subprocess, sys, tempfile, time
+
+def peakRSS():
+	"""
+	Returns the peak resident set size of the current process, in megabytes
+	"""
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return peak / (1024 * 1024) if platform.system() == 'Darwin' else peak / 1024
+
+def extractLegacy(exportFile, thirdPartyRoot, fields):
+	"""
+	Extracts the third-party modules by parsing the entire export, as ue4cli did prior to the introduction of the streaming reader
+	"""
+	with open(exportFile, 'rb') as f:
+		result = json.loads(f.read().decode('utf-8'))
+	modules = [result['Modules'][key] for key in result['Modules']]
+	thirdparty = list([m for m in modules if thirdPartyRoot in m['Directory']])
+	return [{field: module[field] for field in fields if field in module} for module in thirdparty]
+
+def extractStreaming(exportFile, thirdPartyRoot, fields):
+	"""
+	Extracts the third-party modules using the streaming reader
+	"""
+	from ue4cli.JsonExportReader import JsonExportReader
+	return [module for module in JsonExportReader(exportFile).modules(fields) if thirdPartyRoot in module['Directory']]
+
+def runChild(method, exportFile, thirdPartyRoot):
+	"""
+	Performs the extraction in the current process and prints the results as JSON
+	"""
+	from ue4cli.UE4BuildInterrogator import EXPORT_FIELDS
+	baseline = peakRSS()
+	start = time.perf_counter()
+	modules = {'legacy': extractLegacy, 'streaming': extractStreaming}[method](exportFile, thirdPartyRoot, EXPORT_FIELDS)
+	duration = time.perf_counter() - start
+	print(json.dumps({'duration': duration, 'peak': peakRSS(), 'baseline': baseline, 'modules': len(modules)}))
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.strip())
+	parser.add_argument('--modules', type=int, default=20000, help='number of modules in the synthetic export')
+	parser.add_argument('--child', nargs=3, metavar=('METHOD', 'EXPORT', 'THIRDPARTY'), help=argparse.SUPPRESS)
+	parser.add_argument('--generate', nargs=2, metavar=('ENGINE', 'EXPORT'), help=argparse.SUPPRESS)
+	args = parser.parse_args()
+	
+	if args.child is not None:
+		runChild(*args.child)
+		sys.exit(0)
+	
+	if args.generate is not None:
+		with open(args.generate[1], 'w') as f:
+			json.dump(generateExport(args.generate[0], args.modules), f, indent=2)
+		sys.exit(0)
+	
+	tempDir = tempfile.mkdtemp()
+	try:
+	
+		# Generate the synthetic export in a child process
+		# (Under Linux the peak RSS of a process includes that of its parent at the time it was forked,
+		# so the parent must not hold the generated export in memory when it runs the measurements)
+		engineRoot = os.path.join(tempDir, 'engine')
+		exportFile = os.path.join(tempDir, 'export.json')
+		subprocess.run([sys.executable, __file__, '--modules', str(args.modules), '--generate', engineRoot, exportFile], check=True)
+		thirdPartyRoot = os.path.join(engineRoot, 'Engine', 'Source', 'ThirdParty')
+		
+		# Run each method in a fresh process, so the peak RSS of one method does not affect the other
+		env = dict(os.environ)
+		env['PYTHONPATH'] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+		print('Synthetic export: {} modules, {:.1f} MB'.format(args.modules, os.path.getsize(exportFile) / (1024 * 1024)))
+		for method in ['legacy', 'streaming']:
+			output = subprocess.run([sys.executable, __file__, '--child', method, exportFile, thirdPartyRoot], env=env, stdout=subprocess.PIPE, check=True).stdout
+			result = json.loads(output.decode('utf-8'))
+			print('{:<10} {:>8.1f} ms, peak RSS {:>7.1f} MB (+{:.1f} MB over interpreter baseline), {} third-party modules'.format(
+				method,
+				result['duration'] * 1000,
+				result['peak'],
+				result['peak'] - result['baseline'],
+				result['modules']
+			))
+	
+	finally:
+		shutil.rmtree(tempDir, ignore_errors=True)
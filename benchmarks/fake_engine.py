@@ -0,0 +1,92 @@
+"""
+Helpers for creating a fake Unreal Engine tree that ue4cli can be pointed at for benchmarking purposes
+"""
+import json, os, stat, sys
+
+# The shell script that stands in for `Build.sh`, copying the pre-generated JSON export to the requested output file
+BUILD_SCRIPT = '''#!/bin/sh
+for arg in "$@"; do
+	case "$arg" in
+		-OutputFile=*) cp "{export}" "${{arg#-OutputFile=}}";;
+	esac
+done
+'''
+
+def generateExport(engineRoot, numModules):
+	"""
+	Generates a synthetic UBT JSON export containing the specified number of modules, including zlib and libpng
+	"""
+	thirdParty = os.path.join(engineRoot, 'Engine', 'Source', 'ThirdParty')
+	modules = {}
+	for index in range(numModules):
+	
+		# Half of the modules are third-party libraries and the other half are regular engine modules
+		name = ['zlib', 'libpng'][index] if index < 2 else 'Module{}'.format(index)
+		directory = os.path.join(thirdParty, name) if index % 2 == 0 or index < 2 else os.path.join(engineRoot, 'Engine', 'Source', 'Runtime', name)
+		modules[name] = {
+			'Name': name,
+			'Directory': directory,
+			'Type': 'External',
+			'PublicSystemIncludePaths': ['ThirdParty/{}/include'.format(name)],
+			'PublicIncludePaths': [],
+			'PrivateIncludePaths': ['Runtime/{}/Private'.format(name)],
+			'PublicLibraries': ['ThirdParty/{0}/lib/Unix/x86_64-unknown-linux-gnu/lib{0}.a'.format(name)],
+			'PublicSystemLibraries': ['pthread'],
+			'PublicSystemLibraryPaths': [],
+			'PublicDefinitions': ['WITH_{}=1'.format(name.upper())],
+			'PublicDependencyModules': ['Core', 'CoreUObject', 'Engine'],
+			'PrivateDependencyModules': ['Module{}'.format(i) for i in range(index % 20)],
+			'RuntimeDependencies': [{'Path': '$(EngineDir)/Binaries/ThirdParty/{0}/lib{0}.so'.format(name), 'Type': 'NonUFS'}] * 4
+		}
+	
+	return {'Name': 'UnrealEditor', 'Platform': 'Linux', 'Configuration': 'Development', 'Modules': modules}
+
+def createFakeEngine(engineRoot, numModules=2000, majorVersion=5, minorVersion=3):
+	"""
+	Creates a fake engine tree whose `Build.sh` emits a synthetic UBT JSON export
+	"""
+	buildDir = os.path.join(engineRoot, 'Engine', 'Build')
+	batchDir = os.path.join(buildDir, 'BatchFiles', 'Linux')
+	os.makedirs(batchDir, exist_ok=True)
+	os.makedirs(os.path.join(engineRoot, 'Engine', 'Binaries', 'Linux'), exist_ok=True)
+	
+	# Write the version details
+	with open(os.path.join(buildDir, 'Build.version'), 'w') as f:
+		json.dump({
+			'MajorVersion': majorVersion,
+			'MinorVersion': minorVersion,
+			'PatchVersion': 0,
+			'Changelist': 0,
+			'CompatibleChangelist': 0,
+			'IsLicenseeVersion': 0,
+			'IsPromotedBuild': 1,
+			'BranchName': 'UE5'
+		}, f)
+	
+	# Write the synthetic JSON export and the script that emits it
+	exportFile = os.path.join(engineRoot, 'export.json')
+	with open(exportFile, 'w') as f:
+		json.dump(generateExport(engineRoot, numModules), f, indent=2)
+	
+	buildScript = os.path.join(batchDir, 'Build.sh')
+	with open(buildScript, 'w') as f:
+		f.write(BUILD_SCRIPT.format(export=exportFile))
+	os.chmod(buildScript, os.stat(buildScript).st_mode | stat.S_IEXEC)
+	
+	return engineRoot
+
+def ue4Command(args):
+	"""
+	Returns the command used to invoke ue4cli from the source tree with the specified arguments
+	"""
+	return [sys.executable, '-m', 'ue4cli'] + args
+
+def ue4Environment(configDir):
+	"""
+	Returns the environment variables for running ue4cli against an isolated configuration directory
+	"""
+	env = dict(os.environ)
+	env['UE4CLI_CONFIG_DIR'] = configDir
+	env['UE4CLI_QUIET'] = '1'
+	env['PYTHONPATH'] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+	return env
@@ -0,0 +1,38 @@
+"""
+Measures the cold-cache and warm-cache latency of `ue4 cxxflags zlib libpng` against a synthetic UBT JSON export
+"""
+from fake_engine import createFakeEngine, ue4Command, ue4Environment
+import argparse, os, shutil, statistics, subprocess, tempfile, time
+
+def timeCommand(args, env):
+	start = time.perf_counter()
+	subprocess.run(ue4Command(args), env=env, stdout=subprocess.DEVNULL, check=True)
+	return time.perf_counter() - start
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.strip())
+	parser.add_argument('--modules', type=int, default=2000, help='number of modules in the synthetic export')
+	parser.add_argument('--runs', type=int, default=10, help='number of timed runs for each measurement')
+	args = parser.parse_args()
+	
+	tempDir = tempfile.mkdtemp()
+	try:
+		engineRoot = createFakeEngine(os.path.join(tempDir, 'engine'), args.modules)
+		env = ue4Environment(os.path.join(tempDir, 'config'))
+		subprocess.run(ue4Command(['setroot', engineRoot]), env=env, stdout=subprocess.DEVNULL, check=True)
+		
+		# Cold cache: clear the cache before each run so that every run parses and indexes the export
+		cold = []
+		for run in range(args.runs):
+			subprocess.run(ue4Command(['clearcache']), env=env, check=True)
+			cold.append(timeCommand(['cxxflags', 'zlib', 'libpng'], env))
+		
+		# Warm cache: the cache was populated by the last cold run
+		warm = [timeCommand(['cxxflags', 'zlib', 'libpng'], env) for run in range(args.runs)]
+		
+		print('Synthetic export: {} modules'.format(args.modules))
+		print('Cold cache: median {:.1f} ms, min {:.1f} ms'.format(statistics.median(cold) * 1000, min(cold) * 1000))
+		print('Warm cache: median {:.1f} ms, min {:.1f} ms'.format(statistics.median(warm) * 1000, min(warm) * 1000))
+	
+	finally:
+		shutil.rmtree(tempDir, ignore_errors=True)
@@ -0,0 +1,75 @@
+"""
+Measures the startup latency and import time of common ue4cli commands and fails if any exceeds its budget
+"""
+from fake_engine import createFakeEngine, ue4Command, ue4Environment
+import argparse, json, os, re, shutil, statistics, subprocess, sys, tempfile, time
+
+# The commands that are measured and their default wall-clock budgets (in milliseconds)
+DEFAULT_BUDGETS = {
+	'help': 150,
+	'version': 150,
+	'root': 150,
+	'libs': 200,
+	'cxxflags zlib': 250,
+	'clearroot': 150
+}
+
+def timeCommand(args, env):
+	"""
+	Runs the specified command and returns its wall-clock duration in seconds
+	"""
+	start = time.perf_counter()
+	subprocess.run(ue4Command(args), env=env, stdout=subprocess.DEVNULL, check=True)
+	return time.perf_counter() - start
+
+def importTime(args, env):
+	"""
+	Runs the specified command under `-X importtime` and returns the total self time of all imports in seconds
+	"""
+	command = ue4Command(args)
+	output = subprocess.run(command[:1] + ['-X', 'importtime'] + command[1:], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True).stderr
+	matches = re.findall(r'^import time:\s+(\d+)\s+\|', output.decode('utf-8'), re.MULTILINE)
+	return sum(int(match) for match in matches) / 1000000
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.strip())
+	parser.add_argument('--runs', type=int, default=10, help='number of timed runs for each command')
+	parser.add_argument('--budgets', default=None, help='JSON file mapping commands to wall-clock budgets in milliseconds')
+	parser.add_argument('--scale', type=float, default=1.0, help='factor applied to all budgets, for slower machines')
+	args = parser.parse_args()
+	
+	budgets = DEFAULT_BUDGETS
+	if args.budgets is not None:
+		with open(args.budgets) as f:
+			budgets = json.load(f)
+	
+	tempDir = tempfile.mkdtemp()
+	try:
+		engineRoot = createFakeEngine(os.path.join(tempDir, 'engine'), 200)
+		env = ue4Environment(os.path.join(tempDir, 'config'))
+		subprocess.run(ue4Command(['setroot', engineRoot]), env=env, stdout=subprocess.DEVNULL, check=True)
+		
+		# Populate the cache so that we measure startup overheads rather than engine interrogation
+		subprocess.run(ue4Command(['cxxflags', 'zlib']), env=env, stdout=subprocess.DEVNULL, check=True)
+		
+		failures = []
+		print('{:<16} {:>12} {:>12} {:>12}'.format('Command', 'Median (ms)', 'Imports (ms)', 'Budget (ms)'))
+		for command, budget in budgets.items():
+			commandArgs = command.split(' ')
+			durations = [timeCommand(commandArgs, env) for run in range(args.runs)]
+			median = statistics.median(durations) * 1000
+			imports = importTime(commandArgs, env) * 1000
+			limit = budget * args.scale
+			print('{:<16} {:>12.1f} {:>12.1f} {:>12.1f}{}'.format(command, median, imports, limit, '' if median <= limit else '  OVER BUDGET'))
+			if median > limit:
+				failures.append(command)
+			
+			# Commands such as `clearroot` remove the root override, so restore it before measuring the next command
+			subprocess.run(ue4Command(['setroot', engineRoot]), env=env, stdout=subprocess.DEVNULL, check=True)
+	
+	finally:
+		shutil.rmtree(tempDir, ignore_errors=True)
+	
+	if len(failures) > 0:
+		print('Budget exceeded for: {}'.format(', '.join(failures)), file=sys.stderr)
+		sys.exit(1)
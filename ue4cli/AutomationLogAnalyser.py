@@ -0,0 +1,218 @@
+from collections import OrderedDict
+import json, re, time
+
+# The log output that indicates the Editor exited normally (i.e. triggered by `automation quit`)
+# (In Unreal Engine 4.27.0, the exit method changed from RequestExit to RequestExitWithStatus)
+EXIT_REGEX = re.compile('PlatformMisc::RequestExit(WithStatus)?\\(')
+
+# The log output that specifies an explicit exit code for the test run
+EXIT_CODE_REGEX = re.compile('TEST COMPLETE\\. EXIT CODE: ([0-9]+)')
+
+# The log output that indicates an individual test has started or completed
+TEST_STARTED_REGEX = re.compile('Test Started\\. Name=\\{(.*?)\\}(?: Path=\\{(.*?)\\})?')
+TEST_COMPLETED_REGEX = re.compile('Test Completed\\. Result=\\{(\\w+)\\} Name=\\{(.*?)\\}(?: Path=\\{(.*?)\\})?')
+
+# The log output for errors reported by the automation controller, which are attributed to the tests that are running
+TEST_ERROR_REGEX = re.compile('LogAutomationController: Error: (.*)')
+
+# Since UE4 doesn't consistently produce accurate exit codes across all platforms, we need to rely on
+# text-based heuristics to detect failed automation tests or errors related to not finding any tests to run
+ERROR_STRINGS = [
+	'Incorrect automation command syntax!',
+	'Automation Test Failed',
+	'Result={Failed}',
+	'Found 0 Automation Tests, based on',
+	'is not a valid flag to filter on!'
+]
+
+# The test results reported by the different versions of the automation controller
+PASSED_RESULTS = ['Passed', 'Success', 'Succeeded']
+FAILED_RESULTS = ['Failed', 'Fail']
+
+# The maximum number of error messages that we retain for each test
+MAX_TEST_ERRORS = 50
+
+class AutomationLogAnalyser(object):
+	"""
+	Analyses the log output of an automation test run line by line as it is produced, tracking the outcome of each test
+	"""
+	
+	def __init__(self, failFast=False):
+		"""
+		Creates a new analyser, which requests that the test run be aborted on the first failure if `failFast` is True
+		"""
+		self.failFast = failFast
+		self.tests = OrderedDict()
+		self.errors = []
+		self.exitedNormally = False
+		self.exitCode = None
+		self.firstFailure = None
+		self.startTime = time.time()
+		self.endTime = None
+		self._running = OrderedDict()
+	
+	def processLine(self, stream, line):
+		"""
+		Processes a single line of log output, returning True if the test run should be aborted
+		(This has the signature expected by the `lineCallback` parameter of Utility.captureStreaming())
+		"""
+		now = time.time()
+		self.endTime = now
+		
+		# Identify the events that a line can represent, checking the cheapest and most common cases first
+		failure = None
+		if 'Test Started.' in line:
+			match = TEST_STARTED_REGEX.search(line)
+			if match is not None:
+				key, test = self._getTest(match.group(1), match.group(2))
+				test.update({'result': 'Running', 'started': now, 'duration': None})
+				self._running[key] = test
+		
+		elif 'Test Completed.' in line:
+			match = TEST_COMPLETED_REGEX.search(line)
+			if match is not None:
+				key, test = self._getTest(match.group(2), match.group(3))
+				test['result'] = 'Passed' if match.group(1) in PASSED_RESULTS else 'Failed' if match.group(1) in FAILED_RESULTS else match.group(1)
+				test['duration'] = now - test['started'] if test['started'] is not None else None
+				self._running.pop(key, None)
+				if test['result'] == 'Failed':
+					failure = key
+		
+		elif 'LogAutomationController: Error: ' in line:
+			match = TEST_ERROR_REGEX.search(line)
+			for test in self._running.values():
+				if len(test['errors']) < MAX_TEST_ERRORS:
+					test['errors'].append(match.group(1).strip())
+		
+		# Only stdout was checked for the normal exit prior to the introduction of streaming analysis, so we preserve that behaviour
+		if stream == 'stdout' and 'PlatformMisc::RequestExit' in line and EXIT_REGEX.search(line) is not None:
+			self.exitedNormally = True
+		
+		if 'TEST COMPLETE.' in line:
+			match = EXIT_CODE_REGEX.search(line)
+			if match is not None:
+				self.exitCode = int(match.group(1))
+		
+		# Only stdout was checked for the error strings prior to the introduction of streaming analysis, so we preserve that behaviour
+		if stream == 'stdout':
+			for errorStr in ERROR_STRINGS:
+				if errorStr in line:
+					if len(self.errors) < MAX_TEST_ERRORS:
+						self.errors.append(line.strip())
+					failure = failure if failure is not None else line.strip()
+		
+		# Record the first failure and request that the test run be aborted if fail-fast behaviour is enabled
+		if failure is not None and self.firstFailure is None:
+			self.firstFailure = failure
+			return self.failFast
+		
+		return False
+	
+	@staticmethod
+	def merge(analysers):
+		"""
+		Merges the results from several analysers (e.g. one for each of several concurrent test runs) into a single analyser
+		"""
+		merged = AutomationLogAnalyser(any([analyser.failFast for analyser in analysers]))
+		for analyser in analysers:
+			merged.tests.update(analyser.tests)
+			merged._running.update(analyser._running)
+			merged.errors.extend(analyser.errors)
+			merged.firstFailure = merged.firstFailure if merged.firstFailure is not None else analyser.firstFailure
+			merged.startTime = min(merged.startTime, analyser.startTime)
+			merged.endTime = max([time for time in [merged.endTime, analyser.endTime] if time is not None], default=None)
+		
+		# The merged run only exited normally if every run did, and reports the highest of any explicit exit codes
+		exitCodes = [analyser.exitCode for analyser in analysers if analyser.exitCode is not None]
+		merged.exitedNormally = len(analysers) > 0 and all([analyser.exitedNormally for analyser in analysers])
+		merged.exitCode = max(exitCodes) if len(exitCodes) > 0 else None
+		return merged
+	
+	def report(self):
+		"""
+		Returns a dictionary summarising the outcome of the test run, suitable for serialising as JSON
+		"""
+		tests = []
+		for test in self.tests.values():
+			tests.append({
+				'name': test['name'],
+				'path': test['path'],
+				'result': test['result'] if test['result'] != 'Running' else 'Incomplete',
+				'duration': test['duration'],
+				'errors': test['errors']
+			})
+		
+		return {
+			'tests': tests,
+			'passed': len([test for test in tests if test['result'] == 'Passed']),
+			'failed': len([test for test in tests if test['result'] in ['Failed', 'Incomplete']]),
+			'errors': self.errors,
+			'exitedNormally': self.exitedNormally,
+			'exitCode': self.exitCode,
+			'firstFailure': self.firstFailure,
+			'duration': (self.endTime if self.endTime is not None else time.time()) - self.startTime
+		}
+	
+	def writeJsonReport(self, filename):
+		"""
+		Writes a JSON report of the test run to the specified file
+		"""
+		with open(filename, 'w', encoding='utf-8') as f:
+			json.dump(self.report(), f, indent=4)
+	
+	def writeJUnitReport(self, filename, suiteName='UnrealAutomation'):
+		"""
+		Writes a JUnit XML report of the test run to the specified file
+		"""
+		import xml.etree.ElementTree as ET
+		report = self.report()
+		suite = ET.Element('testsuite', {
+			'name': suiteName,
+			'tests': str(len(report['tests'])),
+			'failures': str(len([test for test in report['tests'] if test['result'] == 'Failed'])),
+			'errors': str(len([test for test in report['tests'] if test['result'] == 'Incomplete'])),
+			'skipped': str(len([test for test in report['tests'] if test['result'] not in ['Passed', 'Failed', 'Incomplete']])),
+			'time': '{:.3f}'.format(report['duration'])
+		})
+		
+		for test in report['tests']:
+		
+			# Use the path of the test (minus the final component) as the class name, so tests are grouped by category
+			path = test['path'] if test['path'] is not None else test['name']
+			case = ET.SubElement(suite, 'testcase', {
+				'classname': path.rsplit('.', 1)[0] if '.' in path else suiteName,
+				'name': test['name'],
+				'time': '{:.3f}'.format(test['duration'] if test['duration'] is not None else 0.0)
+			})
+			
+			if test['result'] == 'Failed':
+				failure = ET.SubElement(case, 'failure', {'message': test['errors'][0] if len(test['errors']) > 0 else 'Test failed'})
+				failure.text = '\n'.join(test['errors'])
+			elif test['result'] == 'Incomplete':
+				error = ET.SubElement(case, 'error', {'message': 'Test did not complete'})
+				error.text = '\n'.join(test['errors'])
+			elif test['result'] != 'Passed':
+				ET.SubElement(case, 'skipped', {'message': 'Test result was ' + test['result']})
+		
+		# Record any errors that could not be attributed to a specific test
+		if len(report['errors']) > 0 or report['exitedNormally'] == False:
+			errors = report['errors'] + ([] if report['exitedNormally'] == True else ['The Editor did not exit normally'])
+			ET.SubElement(suite, 'system-err').text = '\n'.join(errors)
+		
+		root = ET.Element('testsuites')
+		root.append(suite)
+		ET.ElementTree(root).write(filename, encoding='utf-8', xml_declaration=True)
+	
+	
+	# "Private" methods
+	
+	def _getTest(self, name, path):
+		"""
+		Retrieves the key and details for the specified test, creating the details if this is the first time we have seen the test
+		(Tests are identified by their full path where available, since the names of tests in different categories can be identical)
+		"""
+		key = path if path is not None else name
+		if key not in self.tests:
+			self.tests[key] = {'name': name, 'path': path, 'result': None, 'started': None, 'duration': None, 'errors': []}
+		
+		return key, self.tests[key]
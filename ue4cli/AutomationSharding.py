@@ -0,0 +1,80 @@
+from .JsonDataManager import JsonDataManager
+import heapq, os
+
+# The duration (in seconds) assumed for tests when we have no historical durations at all
+DEFAULT_TEST_DURATION = 1.0
+
+class AutomationSharding(object):
+	"""
+	Provides functionality for partitioning automation tests into shards that can be run by separate Editor processes
+	"""
+	
+	@staticmethod
+	def selectTests(available, names):
+		"""
+		Returns the available tests that are selected by the specified test names, which match tests by prefix (as the `RunTests` command does)
+		"""
+		prefixes = [name.lower() for name in names]
+		return [test for test in available if len([prefix for prefix in prefixes if test.lower().startswith(prefix)]) > 0]
+	
+	@staticmethod
+	def partition(tests, durations, numShards):
+		"""
+		Partitions the specified tests into at most `numShards` shards with approximately equal total durations,
+		returning a list of shards that each contain the list of test names that should be passed to `RunTests`
+		"""
+		
+		# Since `RunTests` matches tests by prefix, any test whose name is a prefix of other tests would also run those tests,
+		# so each such group of tests must be kept together in a single shard (in sorted order, a group's tests are contiguous)
+		units = []
+		for test in sorted(tests, key = lambda test: test.lower()):
+			if len(units) > 0 and test.lower().startswith(units[-1]['name'].lower()):
+				units[-1]['tests'].append(test)
+			else:
+				units.append({'name': test, 'tests': [test]})
+		
+		# Estimate the duration of any tests without historical durations using the mean of the known durations
+		known = [durations[test] for test in tests if test in durations]
+		fallback = sum(known) / len(known) if len(known) > 0 else DEFAULT_TEST_DURATION
+		for unit in units:
+			unit['duration'] = sum([durations.get(test, fallback) for test in unit['tests']])
+		
+		# Assign the units to shards using the longest processing time first heuristic,
+		# which places each unit (from longest to shortest) into the shard with the least total duration so far
+		shards = [(0.0, index, []) for index in range(min(numShards, len(units)))]
+		for unit in sorted(units, key = lambda unit: unit['duration'], reverse=True):
+			total, index, names = heapq.heappop(shards)
+			names.append(unit['name'])
+			heapq.heappush(shards, (total + unit['duration'], index, names))
+		
+		return [names for total, index, names in sorted(shards, key = lambda shard: shard[1])]
+	
+	@staticmethod
+	def getDurations(projectDir):
+		"""
+		Retrieves the historical test durations for the specified project
+		"""
+		return JsonDataManager(AutomationSharding._durationsFile(projectDir)).getDictionary()
+	
+	@staticmethod
+	def updateDurations(projectDir, analyser):
+		"""
+		Records the durations of the completed tests from the supplied AutomationLogAnalyser in the historical test durations for the specified project
+		"""
+		durations = {test['path'] or test['name']: test['duration'] for test in analyser.report()['tests'] if test['duration'] is not None}
+		if len(durations) > 0:
+			JsonDataManager(AutomationSharding._durationsFile(projectDir)).setKeys(durations)
+	
+	@staticmethod
+	def shardDirectory(projectDir, shard):
+		"""
+		Returns the directory that holds the log file and saved data for the specified shard
+		"""
+		return os.path.join(projectDir, 'Saved', 'Automation', 'Shards', 'Shard{}'.format(shard))
+	
+	
+	# "Private" methods
+	
+	@staticmethod
+	def _durationsFile(projectDir):
+		return os.path.join(projectDir, 'Intermediate', 'ue4cli', 'TestDurations.json')
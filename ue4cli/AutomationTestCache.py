@@ -0,0 +1,44 @@
+from .FilesystemScanner import FilesystemScanner
+from .JsonDataManager import JsonDataManager
+from .ProjectIndex import ProjectIndex
+import os
+
+class AutomationTestCache(object):
+	"""
+	Provides functionality for caching the list of automation tests for a project, so the Editor only needs
+	to be run to discover the tests when the project descriptor, the project or plugin binaries, or the engine change
+	"""
+	
+	@staticmethod
+	def fingerprint(projectFile, engineVersionHash, editorBinary):
+		"""
+		Computes the fingerprint that identifies the set of automation tests available for the specified project
+		"""
+		
+		# Include the project descriptor (which determines the enabled plugins), the Editor binary (which changes when rebuilding source
+		# builds of the engine) and each file under the project and plugin `Binaries` directories, so rebuilding any module invalidates the list
+		index = ProjectIndex.forDirectory(os.path.dirname(projectFile))
+		binariesDirs = [os.path.join(root, 'Binaries') for root in [index['root']] + [plugin['root'] for plugin in index['plugins']]]
+		return FilesystemScanner.digest(binariesDirs, [projectFile, editorBinary], [engineVersionHash])
+	
+	@staticmethod
+	def getTests(projectFile, fingerprint):
+		"""
+		Retrieves the cached list of automation tests for the specified project, or None if the list is missing or stale
+		"""
+		cached = JsonDataManager(AutomationTestCache._cacheFile(projectFile)).getDictionary()
+		return cached['tests'] if cached.get('fingerprint') == fingerprint and 'tests' in cached else None
+	
+	@staticmethod
+	def setTests(projectFile, fingerprint, tests):
+		"""
+		Caches the list of automation tests for the specified project
+		"""
+		JsonDataManager(AutomationTestCache._cacheFile(projectFile)).setDictionary({'fingerprint': fingerprint, 'tests': tests})
+	
+	
+	# "Private" methods
+	
+	@staticmethod
+	def _cacheFile(projectFile):
+		return os.path.join(os.path.dirname(projectFile), 'Intermediate', 'ue4cli', 'AutomationTests.json')
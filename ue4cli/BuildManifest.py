@@ -0,0 +1,88 @@
+from .FilesystemScanner import FilesystemScanner
+from .JsonDataManager import JsonDataManager
+from .ProjectIndex import ProjectIndex
+import os
+
+class BuildManifest(object):
+	"""
+	Provides functionality for detecting when a project or plugin is unchanged since its last successful build or package,
+	so the build can be skipped without running UnrealBuildTool at all, or the unchanged phases of packaging can be skipped
+	"""
+	
+	@staticmethod
+	def enabled():
+		"""
+		Determines if the detection of unchanged builds is enabled (it is opt-in, since changes that are not reflected
+		in the files we scan, such as changes to engine source code in a source build, will not be detected)
+		"""
+		return os.environ.get('UE4CLI_SKIP_UNCHANGED_BUILDS', '0') == '1'
+	
+	@staticmethod
+	def inputsFingerprint(dir, descriptor, buildArgs, engineVersionHash):
+		"""
+		Computes the fingerprint of the build inputs for the project or plugin in the specified directory, which
+		covers the `Source` trees and descriptors of the project or plugin and any plugins that it contains
+		"""
+		index = ProjectIndex.forDirectory(dir)
+		roots = [index['root']] + [plugin['root'] for plugin in index['plugins']]
+		descriptors = [descriptor] + [plugin['descriptor'] for plugin in index['plugins']]
+		return FilesystemScanner.digest([os.path.join(root, 'Source') for root in roots], descriptors, [engineVersionHash] + buildArgs)
+	
+	@staticmethod
+	def outputsFingerprint(dir, extraFiles=[]):
+		"""
+		Computes the fingerprint of the build outputs for the project or plugin in the specified directory, which covers the
+		`Binaries` directories of the project or plugin and any plugins that it contains, along with any additional files
+		"""
+		index = ProjectIndex.forDirectory(dir)
+		roots = [index['root']] + [plugin['root'] for plugin in index['plugins']]
+		return FilesystemScanner.digest([os.path.join(root, 'Binaries') for root in roots], extraFiles)
+	
+	@staticmethod
+	def contentFingerprint(dir, descriptor, cookArgs, engineVersionHash):
+		"""
+		Computes the fingerprint of the content inputs for the project in the specified directory, which covers
+		the `Content` and `Config` directories and descriptors of the project and any plugins that it contains
+		"""
+		index = ProjectIndex.forDirectory(dir)
+		roots = [index['root']] + [plugin['root'] for plugin in index['plugins']]
+		descriptors = [descriptor] + [plugin['descriptor'] for plugin in index['plugins']]
+		directories = [os.path.join(root, subdir) for root in roots for subdir in ['Content', 'Config']]
+		return FilesystemScanner.digest(directories, descriptors, [engineVersionHash] + cookArgs)
+	
+	@staticmethod
+	def isUnchanged(dir, key, inputs, outputs):
+		"""
+		Determines if the specified build inputs and outputs match those recorded after the last successful build with the specified key
+		"""
+		recorded = JsonDataManager(BuildManifest._manifestFile(dir)).getKey(key)
+		return recorded is not None and recorded.get('inputs') == inputs and recorded.get('outputs') == outputs
+	
+	@staticmethod
+	def record(dir, key, inputs, outputs):
+		"""
+		Records the build inputs and outputs for a successful build with the specified key
+		"""
+		JsonDataManager(BuildManifest._manifestFile(dir)).setKey(key, {'inputs': inputs, 'outputs': outputs})
+	
+	
+	@staticmethod
+	def getPackageRecord(dir, key):
+		"""
+		Retrieves the code and content fingerprints recorded for the last successful package with the specified key, or None if there is none
+		"""
+		return JsonDataManager(BuildManifest._manifestFile(dir, 'PackageManifest.json')).getKey(key)
+	
+	@staticmethod
+	def recordPackage(dir, key, code, content):
+		"""
+		Records the code and content fingerprints for a successful package with the specified key
+		"""
+		JsonDataManager(BuildManifest._manifestFile(dir, 'PackageManifest.json')).setKey(key, {'code': code, 'content': content})
+	
+	
+	# "Private" methods
+	
+	@staticmethod
+	def _manifestFile(dir, filename='BuildManifest.json'):
+		return os.path.join(dir, 'Intermediate', 'ue4cli', filename)
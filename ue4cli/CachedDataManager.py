@@ -1,18 +1,32 @@
 from .ConfigurationManager import ConfigurationManager
 from .JsonDataManager import JsonDataManager
-import os, shutil
+from .Utility import Utility
+import json, os, time
+
+# The default upper limit for the total size of our cached data, in megabytes
+DEFAULT_CACHE_SIZE_LIMIT = 1024
+
+# The resolution with which we track the last access time of cache entries, in seconds
+ACCESS_TIME_RESOLUTION = 60
+
+# The maximum number of outputs memoised for each cache entry, beyond which the least recently memoised outputs are discarded
+MAX_MEMOISED_OUTPUTS = 64
 
 class CachedDataManager(object):
 	"""
 	Provides functionality for caching data about different engine versions
 	"""
 	
+	# The in-memory copies of the cache entries we have parsed, keyed by filename
+	_memory = {}
+	
 	@staticmethod
 	def clearCache():
 		"""
 		Clears any cached data we have stored about specific engine versions
 		"""
 		if os.path.exists(CachedDataManager._cacheDir()) == True:
+			import shutil
 			shutil.rmtree(CachedDataManager._cacheDir())
 	
 	@staticmethod
@@ -31,6 +45,160 @@ class CachedDataManager(object):
 		cacheFile = CachedDataManager._cacheFileForHash(engineVersionHash)
 		return JsonDataManager(cacheFile).setKey(key, value)
 	
+	@staticmethod
+	def getHostDataKey(key):
+		"""
+		Retrieves the cached data value for the specified dictionary key that is not specific to any engine version
+		"""
+		return JsonDataManager(CachedDataManager._hostDataFile()).getKey(key)
+	
+	@staticmethod
+	def setHostDataKey(key, value):
+		"""
+		Sets the cached data value for the specified dictionary key that is not specific to any engine version
+		"""
+		return JsonDataManager(CachedDataManager._hostDataFile()).setKey(key, value)
+	
+	@staticmethod
+	def getCacheEntry(engineVersionHash, name, qualifiers):
+		"""
+		Retrieves the data for the cache entry with the specified name and qualifiers, or None if no such entry exists
+		"""
+		entryFile = CachedDataManager._cacheFileForEntry(engineVersionHash, name, qualifiers)
+		try:
+			stat = os.stat(entryFile)
+		except OSError:
+			return None
+		
+		# If we have already parsed the current version of the entry in this process then use the in-memory copy
+		# (Since entries are written by atomically replacing the file, a rewritten entry will always have a new inode)
+		identifier = (stat.st_ino, stat.st_size)
+		memory = CachedDataManager._memory.get(entryFile, None)
+		if memory is not None and memory[0] == identifier:
+			data = memory[1]
+		else:
+			try:
+				data = json.loads(Utility.readFile(entryFile))['data']
+			except (OSError, ValueError, KeyError):
+				return None
+			CachedDataManager._memory[entryFile] = (identifier, data)
+		
+		# Update the modification time of the entry file, which we use as the last access time for LRU eviction
+		# (To avoid writing to the filesystem on every access, we only do this if the entry hasn't been accessed recently)
+		if stat.st_mtime < time.time() - ACCESS_TIME_RESOLUTION:
+			try:
+				os.utime(entryFile, None)
+			except OSError:
+				pass
+		
+		return data
+	
+	@staticmethod
+	def setCacheEntry(engineVersionHash, name, qualifiers, data, metadata={}):
+		"""
+		Stores the data for the cache entry with the specified name and qualifiers, evicting older entries if the cache size limit is exceeded
+		"""
+		entryFile = CachedDataManager._cacheFileForEntry(engineVersionHash, name, qualifiers)
+		entryMetadata = dict(metadata)
+		entryMetadata.update({
+			'engineVersionHash': engineVersionHash,
+			'name': name,
+			'qualifiers': list(qualifiers),
+			'created': time.time()
+		})
+		JsonDataManager(entryFile).setDictionary({'metadata': entryMetadata, 'data': data})
+		CachedDataManager.enforceSizeLimit([entryFile])
+	
+	@staticmethod
+	def getMemoisedOutput(engineVersionHash, name, qualifiers, key):
+		"""
+		Retrieves the memoised output derived from the specified cache entry, or None if it is missing or the cache entry has changed
+		"""
+		memo = CachedDataManager.getCacheEntry(engineVersionHash, name + 'Memo', qualifiers)
+		if memo is None or memo['source'] != CachedDataManager._identifyEntry(engineVersionHash, name, qualifiers) or 'recent' not in memo:
+			return None
+		
+		for memoKey, output in memo['recent']:
+			if memoKey == key:
+				return output
+		
+		return None
+	
+	@staticmethod
+	def setMemoisedOutput(engineVersionHash, name, qualifiers, key, output):
+		"""
+		Memoises output derived from the specified cache entry, discarding any outputs memoised for a previous version of the entry
+		"""
+		source = CachedDataManager._identifyEntry(engineVersionHash, name, qualifiers)
+		if source is None:
+			return
+		
+		memo = CachedDataManager.getCacheEntry(engineVersionHash, name + 'Memo', qualifiers)
+		if memo is None or memo['source'] != source or 'recent' not in memo:
+			memo = {'source': source, 'recent': []}
+		
+		# Outputs are stored as a list of [key, output] pairs, most recently memoised last, and only the most recent outputs are retained
+		# (We build a new list rather than modifying the in-memory copy of the existing entry)
+		recent = [pair for pair in memo['recent'] if pair[0] != key] + [[key, output]]
+		memo = {'source': source, 'recent': recent[-MAX_MEMOISED_OUTPUTS:]}
+		CachedDataManager.setCacheEntry(engineVersionHash, name + 'Memo', qualifiers, memo)
+	
+	@staticmethod
+	def getLockFile(engineVersionHash, name):
+		"""
+		Returns the location of the lock file with the specified name for serialising work related to the specified engine version
+		"""
+		return os.path.join(CachedDataManager._cacheDir(), engineVersionHash, name + '.lock')
+	
+	@staticmethod
+	def listCacheEntries():
+		"""
+		Returns the metadata for each of the cache entries we have stored, including their size and last access time
+		"""
+		entries = []
+		for entryFile, size, lastAccess in CachedDataManager._listCacheFiles():
+			try:
+				metadata = json.loads(Utility.readFile(entryFile)).get('metadata', None)
+			except (OSError, ValueError, AttributeError):
+				metadata = None
+			if metadata is not None:
+				metadata.update({'file': entryFile, 'size': size, 'lastAccess': lastAccess})
+				entries.append(metadata)
+		
+		return entries
+	
+	@staticmethod
+	def getCacheSizeLimit():
+		"""
+		Returns the upper limit for the total size of our cached data, in bytes
+		"""
+		try:
+			limit = float(os.environ.get('UE4CLI_CACHE_SIZE_LIMIT', DEFAULT_CACHE_SIZE_LIMIT))
+		except ValueError:
+			limit = DEFAULT_CACHE_SIZE_LIMIT
+		return int(limit * 1024 * 1024)
+	
+	@staticmethod
+	def enforceSizeLimit(preserve=[]):
+		"""
+		Evicts the least recently used cache files until the total size of our cached data falls within the limit
+		"""
+		files = CachedDataManager._listCacheFiles()
+		totalSize = sum([size for (_, size, _) in files])
+		limit = CachedDataManager.getCacheSizeLimit()
+		
+		# Evict files in order of last access, oldest first, never evicting any files we were asked to preserve
+		for entryFile, size, lastAccess in sorted(files, key=lambda f: f[2]):
+			if totalSize <= limit:
+				break
+			if entryFile not in preserve:
+				# (We never remove the lock file for an entry, since another process may be holding it or waiting to acquire it)
+				try:
+					os.unlink(entryFile)
+					totalSize -= size
+				except OSError:
+					pass
+	
 	# "Private" methods
 	
 	@staticmethod
@@ -40,3 +208,52 @@ class CachedDataManager(object):
 	@staticmethod
 	def _cacheFileForHash(hash):
 		return os.path.join(CachedDataManager._cacheDir(), hash + '.json')
+	
+	@staticmethod
+	def _hostDataFile():
+		return os.path.join(CachedDataManager._cacheDir(), 'host.json')
+	
+	@staticmethod
+	def _cacheFileForEntry(hash, name, qualifiers):
+		filename = '-'.join([name] + [str(q).replace(os.sep, '_') for q in qualifiers]) + '.json'
+		return os.path.join(CachedDataManager._cacheDir(), hash, filename)
+	
+	@staticmethod
+	def _identifyEntry(hash, name, qualifiers):
+		"""
+		Returns an identifier for the current version of a cache entry, or None if the entry does not exist
+		"""
+		
+		# Since entries are written by atomically replacing the file, a rewritten entry will always have a new inode
+		try:
+			stat = os.stat(CachedDataManager._cacheFileForEntry(hash, name, qualifiers))
+			return [stat.st_ino, stat.st_size]
+		except OSError:
+			return None
+	
+	@staticmethod
+	def _listCacheFiles():
+		"""
+		Returns a list of (path, size, last access time) tuples for all of the cache entry files, which reside in the per-engine subdirectories
+		of the cache directory (the host data and per-engine data files in the cache directory itself are not entries, and are never evicted)
+		"""
+		files = []
+		for subdir in CachedDataManager._listEntries(CachedDataManager._cacheDir()):
+			if subdir.is_dir() == False:
+				continue
+			for entry in CachedDataManager._listEntries(subdir.path):
+				if entry.name.endswith('.json') and entry.is_file():
+					try:
+						stat = entry.stat()
+						files.append((entry.path, stat.st_size, stat.st_mtime))
+					except OSError:
+						pass
+		
+		return files
+	
+	@staticmethod
+	def _listEntries(directory):
+		try:
+			return list(os.scandir(directory))
+		except OSError:
+			return []
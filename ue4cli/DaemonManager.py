@@ -0,0 +1,210 @@
+from .ConfigurationManager import ConfigurationManager
+from .UnrealManagerException import UnrealManagerException
+from .Utility import Utility
+import io, json, os
+
+# The commands that can be served by the daemon, which are those that only query engine metadata
+DAEMON_COMMANDS = ['root', 'version', 'libs', 'cxxflags', 'ldflags', 'cmakeflags', 'includedirs', 'libfiles', 'defines']
+
+# The environment variables that affect the output of the commands served by the daemon
+FORWARDED_ENVIRONMENT = ['UE4CLI_SENTINEL_RENAME', 'UE4CLI_QUIET', 'UE4CLI_VERBOSE', 'UE4CLI_CACHE_SIZE_LIMIT', 'UE4CLI_ENGINE_SEARCH_ROOTS']
+
+class DaemonManager(object):
+	"""
+	Provides functionality for serving engine metadata queries from a resident process over a Unix domain socket
+	"""
+	
+	@staticmethod
+	def isSupported():
+		"""
+		Determines if Unix domain sockets are supported under the current platform
+		"""
+		import socket
+		return hasattr(socket, 'AF_UNIX')
+	
+	@staticmethod
+	def socketPath():
+		"""
+		Returns the location of the Unix domain socket that the daemon listens on
+		"""
+		return os.path.join(ConfigurationManager.getConfigDirectory(), 'daemon.sock')
+	
+	@staticmethod
+	def query(command, args, engine=None):
+		"""
+		Sends a command to the daemon for the specified engine selector and returns its response, or None if the daemon is not running
+		"""
+		if DaemonManager.isSupported() == False or os.path.exists(DaemonManager.socketPath()) == False:
+			return None
+		
+		return DaemonManager._sendRequest({
+			'command': command,
+			'args': args,
+			'engine': engine,
+			'env': {key: os.environ[key] for key in FORWARDED_ENVIRONMENT if key in os.environ}
+		})
+	
+	@staticmethod
+	def handleDaemonCommand(actions, args):
+		"""
+		Handles the `ue4 daemon` command, which either runs the daemon in the foreground or controls a running daemon
+		"""
+		if DaemonManager.isSupported() == False:
+			raise UnrealManagerException('the daemon requires Unix domain socket support, which is not available under this platform')
+		
+		if '--stop' in args:
+			if DaemonManager._sendRequest({'command': '__shutdown__'}) is None:
+				raise UnrealManagerException('the daemon is not running')
+		elif '--status' in args:
+			response = DaemonManager._sendRequest({'command': '__status__'})
+			print('Daemon is running with PID {}'.format(response['pid']) if response is not None else 'Daemon is not running')
+		else:
+			DaemonManager.serve(actions)
+	
+	@staticmethod
+	def serve(actions):
+		"""
+		Serves the supplied command actions over the daemon socket until a shutdown request is received
+		"""
+		import socket
+		
+		# Refuse to start if another daemon is already listening on the socket, and remove the socket file if it is stale
+		path = DaemonManager.socketPath()
+		if DaemonManager._sendRequest({'command': '__status__'}) is not None:
+			raise UnrealManagerException('the daemon is already running')
+		if os.path.exists(path):
+			os.unlink(path)
+		
+		# Create the socket and ensure only the current user can connect to it
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		server.bind(path)
+		os.chmod(path, 0o600)
+		server.listen(128)
+		Utility.printStderr('Listening on {}'.format(path))
+		
+		# Keep a warm manager instance for each engine selector, recreating them whenever the configuration (e.g. the engine root override) changes
+		managers = {}
+		configStamp = None
+		try:
+			while True:
+				connection, _ = server.accept()
+				with connection:
+					try:
+						request = json.loads(DaemonManager._receive(connection).decode('utf-8'))
+						if request['command'] in ['__shutdown__', '__status__']:
+							DaemonManager._send(connection, {'pid': os.getpid()})
+							if request['command'] == '__shutdown__':
+								break
+							continue
+						
+						currentStamp = DaemonManager._configStamp()
+						if currentStamp != configStamp:
+							managers = {}
+							configStamp = currentStamp
+						
+						DaemonManager._send(connection, DaemonManager._execute(managers, actions, request))
+					
+					# Ignore malformed requests and clients that disconnect before receiving their response
+					except (OSError, ValueError, KeyError):
+						pass
+		finally:
+			server.close()
+			try:
+				os.unlink(path)
+			except OSError:
+				pass
+	
+	
+	# "Private" methods
+	
+	@staticmethod
+	def _execute(managers, actions, request):
+		"""
+		Executes a command on behalf of a client and captures its output
+		"""
+		import contextlib, traceback
+		from .EngineRegistry import EngineRegistry
+		from .UnrealManagerFactory import UnrealManagerFactory
+		stdout = io.StringIO()
+		stderr = io.StringIO()
+		returncode = 0
+		
+		# Apply the client's environment variables for the duration of the command
+		previousEnv = {key: os.environ.get(key, None) for key in FORWARDED_ENVIRONMENT}
+		for key in FORWARDED_ENVIRONMENT:
+			if key in request['env']:
+				os.environ[key] = request['env'][key]
+			elif key in os.environ:
+				del os.environ[key]
+		
+		try:
+			with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+				try:
+					if request['command'] not in DAEMON_COMMANDS:
+						raise UnrealManagerException('command "{}" is not supported by the daemon'.format(request['command']))
+					
+					# Resolve the client's engine selector and create a manager for it if we do not already have one
+					engine = request.get('engine', None)
+					if engine not in managers:
+						managers[engine] = UnrealManagerFactory.create(EngineRegistry.resolve(engine) if engine is not None else None)
+					manager = managers[engine]
+					actions[request['command']]['action'](manager, list(request['args']))
+				except UnrealManagerException as e:
+					print('Error: ' + str(e))
+					returncode = 1
+				except SystemExit as e:
+					returncode = e.code if isinstance(e.code, int) else 1
+				except Exception:
+					traceback.print_exc()
+					returncode = 1
+		finally:
+			for key, value in previousEnv.items():
+				if value is not None:
+					os.environ[key] = value
+				elif key in os.environ:
+					del os.environ[key]
+		
+		return {'returncode': returncode, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+	
+	@staticmethod
+	def _configStamp():
+		"""
+		Returns the modification time of the configuration file, used to detect configuration changes
+		"""
+		try:
+			return os.stat(ConfigurationManager._configFile()).st_mtime
+		except OSError:
+			return None
+	
+	@staticmethod
+	def _sendRequest(request):
+		"""
+		Sends a request to the daemon and returns the response, or None if the daemon could not be reached
+		"""
+		import socket
+		client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		try:
+			client.connect(DaemonManager.socketPath())
+			DaemonManager._send(client, request)
+			client.shutdown(socket.SHUT_WR)
+			return json.loads(DaemonManager._receive(client).decode('utf-8'))
+		except (OSError, ValueError):
+			return None
+		finally:
+			client.close()
+	
+	@staticmethod
+	def _send(connection, data):
+		connection.sendall(json.dumps(data).encode('utf-8'))
+	
+	@staticmethod
+	def _receive(connection):
+		chunks = []
+		while True:
+			chunk = connection.recv(65536)
+			if not chunk:
+				break
+			chunks.append(chunk)
+		
+		return b''.join(chunks)
@@ -0,0 +1,158 @@
+from .CachedDataManager import CachedDataManager
+from .ConfigurationManager import ConfigurationManager
+from .EngineSnapshot import EngineSnapshot
+from .UnrealManagerException import UnrealManagerException
+import os, platform
+
+class EngineRegistry(object):
+	"""
+	Provides functionality for discovering the Unreal Engine installations present on the host system
+	"""
+	
+	@staticmethod
+	def getSearchRoots():
+		"""
+		Returns the list of directories that are scanned for engine installations
+		"""
+		
+		# If an explicit list of search roots was specified in the environment then use that, otherwise use the configured search roots
+		if 'UE4CLI_ENGINE_SEARCH_ROOTS' in os.environ:
+			return [root for root in os.environ['UE4CLI_ENGINE_SEARCH_ROOTS'].split(os.pathsep) if root != '']
+		return EngineRegistry.getConfiguredSearchRoots()
+	
+	@staticmethod
+	def getConfiguredSearchRoots():
+		"""
+		Returns the list of configured search roots, which defaults to the default installation locations for the host platform
+		(Unlike getSearchRoots(), this ignores any search roots specified by the UE4CLI_ENGINE_SEARCH_ROOTS environment variable)
+		"""
+		configured = ConfigurationManager.getConfigKey('engineSearchRoots')
+		if configured is not None:
+			return configured
+		elif platform.system() == 'Windows':
+			return [os.path.join(os.environ['PROGRAMFILES'], 'Epic Games')]
+		elif platform.system() == 'Darwin':
+			return ['/Users/Shared/Epic Games']
+		else:
+			return [os.path.expanduser('~'), '/opt']
+	
+	@staticmethod
+	def addSearchRoot(root):
+		"""
+		Adds a directory to the list of configured search roots
+		"""
+		root = os.path.abspath(root)
+		roots = EngineRegistry.getConfiguredSearchRoots()
+		if root not in roots:
+			ConfigurationManager.setConfigKey('engineSearchRoots', roots + [root])
+	
+	@staticmethod
+	def removeSearchRoot(root):
+		"""
+		Removes a directory from the list of configured search roots
+		"""
+		root = os.path.abspath(root)
+		ConfigurationManager.setConfigKey('engineSearchRoots', [existing for existing in EngineRegistry.getConfiguredSearchRoots() if existing != root])
+	
+	@staticmethod
+	def listEngines(refresh=False):
+		"""
+		Returns the details of the detected engine installations, sorted from newest to oldest version
+		"""
+		
+		# Use the cached registry if the search roots have not changed and none of the listed engines have been removed
+		# (Installing a new engine into a search root modifies the search root directory, which updates its stamp)
+		searchRoots = EngineRegistry.getSearchRoots()
+		stamps = EngineRegistry._searchRootStamps(searchRoots)
+		cached = CachedDataManager.getHostDataKey('EngineRegistry')
+		if refresh == False and cached is not None and cached['searchRoots'] == searchRoots and cached['stamps'] == stamps:
+			if all([os.path.exists(EngineSnapshot.versionFileForRoot(engine['root'])) for engine in cached['engines']]):
+				return cached['engines']
+		
+		engines = EngineRegistry._scan(searchRoots)
+		CachedDataManager.setHostDataKey('EngineRegistry', {'searchRoots': searchRoots, 'stamps': stamps, 'engines': engines})
+		return engines
+	
+	@staticmethod
+	def resolve(selector):
+		"""
+		Resolves an engine selector, which is either an engine root directory or a version prefix such as "5.3", to an engine root directory
+		"""
+		
+		# If the selector is an engine root directory then use it directly
+		if os.path.exists(EngineSnapshot.versionFileForRoot(selector)):
+			return os.path.abspath(selector)
+		
+		# Select the newest engine whose version matches the selector, rescanning the search roots if no engines match
+		for refresh in [False, True]:
+			matches = [
+				engine for engine in EngineRegistry.listEngines(refresh)
+				if engine['version'] == selector or engine['version'].startswith(selector + '.')
+			]
+			if len(matches) > 0:
+				return matches[0]['root']
+		
+		raise UnrealManagerException('no Unreal Engine installation matches "{}"! Use `ue4 engines` to list detected installations'.format(selector))
+	
+	
+	@staticmethod
+	def probe(candidate):
+		"""
+		Returns the details of the engine installation in the specified directory, or None if it does not contain one
+		"""
+		try:
+			snapshot = EngineSnapshot.fromEngineRoot(os.path.realpath(candidate))
+			versionTuple = [snapshot.versionDetails['MajorVersion'], snapshot.versionDetails['MinorVersion'], snapshot.versionDetails['PatchVersion']]
+		except (OSError, ValueError, KeyError):
+			return None
+		
+		return {
+			'root': snapshot.root,
+			'version': '.'.join([str(component) for component in versionTuple]),
+			'versionTuple': versionTuple,
+			'changelist': snapshot.changelist,
+			'installedBuild': snapshot.installedBuild
+		}
+	
+	
+	# "Private" methods
+	
+	@staticmethod
+	def _scan(searchRoots):
+		"""
+		Scans the specified search roots and their immediate subdirectories for engine installations
+		"""
+		from concurrent.futures import ThreadPoolExecutor
+		with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+		
+			# List the candidate directories under each of the search roots in parallel
+			candidates = []
+			for subdirs in executor.map(EngineRegistry._listSubdirectories, searchRoots):
+				candidates.extend(subdirs)
+			
+			# Probe each candidate directory in parallel, since each probe requires filesystem access that may be slow on network mounts
+			engines = {}
+			for details in executor.map(EngineRegistry.probe, searchRoots + candidates):
+				if details is not None:
+					engines[details['root']] = details
+		
+		# Sort the engines from newest to oldest version
+		return sorted(engines.values(), key = lambda engine: (engine['versionTuple'], engine['changelist']), reverse=True)
+	
+	@staticmethod
+	def _listSubdirectories(searchRoot):
+		try:
+			return [entry.path for entry in os.scandir(searchRoot) if entry.is_dir() and entry.name.startswith('.') == False]
+		except OSError:
+			return []
+	
+	@staticmethod
+	def _searchRootStamps(searchRoots):
+		stamps = []
+		for root in searchRoots:
+			try:
+				stamps.append(os.stat(root).st_mtime)
+			except OSError:
+				stamps.append(None)
+		
+		return stamps
@@ -0,0 +1,70 @@
+from collections import namedtuple
+from .Utility import Utility
+import hashlib, json, os
+
+class EngineSnapshot(namedtuple('EngineSnapshot', [
+	'root',
+	'versionFile',
+	'versionMtime',
+	'versionDetails',
+	'changelist',
+	'installedBuild',
+	'versionHash',
+	'buildScript',
+	'runUATScript',
+	'editorBinary',
+	'editorBinaryCmd'
+])):
+	"""
+	Immutable snapshot of the metadata for an Unreal Engine installation
+	"""
+	__slots__ = ()
+	
+	@staticmethod
+	def versionFileForRoot(engineRoot):
+		"""
+		Returns the location of the `Build.version` file for the specified engine root directory
+		"""
+		return os.path.join(engineRoot, 'Engine', 'Build', 'Build.version')
+	
+	@staticmethod
+	def fromEngineRoot(engineRoot):
+		"""
+		Parses the version details for the specified engine root directory and creates a snapshot with no resolved paths
+		"""
+		versionFile = EngineSnapshot.versionFileForRoot(engineRoot)
+		versionMtime = os.stat(versionFile).st_mtime
+		versionDetails = json.loads(Utility.readFile(versionFile))
+		
+		# Newer versions of the engine use the key "CompatibleChangelist", older ones use "Changelist"
+		if 'CompatibleChangelist' in versionDetails:
+			changelist = int(versionDetails['CompatibleChangelist'])
+		else:
+			changelist = int(versionDetails['Changelist'])
+		
+		# Compute the SHA-256 hash of the JSON version details, which is used to key our cached data
+		hash = hashlib.sha256()
+		hash.update(json.dumps(versionDetails, sort_keys=True, indent=0).encode('utf-8'))
+		
+		return EngineSnapshot(
+			root = engineRoot,
+			versionFile = versionFile,
+			versionMtime = versionMtime,
+			versionDetails = versionDetails,
+			changelist = changelist,
+			installedBuild = os.path.exists(os.path.join(engineRoot, 'Engine', 'Build', 'InstalledBuild.txt')),
+			versionHash = hash.hexdigest(),
+			buildScript = None,
+			runUATScript = None,
+			editorBinary = None,
+			editorBinaryCmd = None
+		)
+	
+	def isCurrent(self):
+		"""
+		Determines if the `Build.version` file has been modified since this snapshot was created
+		"""
+		try:
+			return os.stat(self.versionFile).st_mtime == self.versionMtime
+		except OSError:
+			return False
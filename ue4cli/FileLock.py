@@ -0,0 +1,73 @@
+import os, time
+
+# Interprocess file locking uses fcntl under Unix-like platforms and msvcrt under Windows
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+	import msvcrt
+
+class FileLock(object):
+	"""
+	Provides an exclusive interprocess lock backed by a lock file
+	"""
+	
+	def __init__(self, lockFile):
+		"""
+		Creates a new FileLock instance for the specified lock file
+		"""
+		self.lockFile = lockFile
+		self._handle = None
+	
+	def __enter__(self):
+		self.acquire()
+		return self
+	
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.release()
+	
+	def acquire(self):
+		"""
+		Blocks until the lock has been acquired
+		"""
+		
+		# Create the directory containing the lock file if it doesn't already exist
+		lockDir = os.path.dirname(self.lockFile)
+		if lockDir != '' and os.path.exists(lockDir) == False:
+			os.makedirs(lockDir, exist_ok=True)
+		
+		self._handle = open(self.lockFile, 'a+b')
+		try:
+			if fcntl is not None:
+				fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+			else:
+			
+				# msvcrt.locking() gives up after ten attempts when using LK_LOCK, so keep polling until we succeed
+				self._handle.seek(0)
+				while True:
+					try:
+						msvcrt.locking(self._handle.fileno(), msvcrt.LK_NBLCK, 1)
+						break
+					except OSError:
+						time.sleep(0.001)
+		except:
+			self._handle.close()
+			self._handle = None
+			raise
+	
+	def release(self):
+		"""
+		Releases the lock if it is currently held
+		"""
+		if self._handle is None:
+			return
+		
+		try:
+			if fcntl is not None:
+				fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+			else:
+				self._handle.seek(0)
+				msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+		finally:
+			self._handle.close()
+			self._handle = None
@@ -0,0 +1,70 @@
+import hashlib, os
+
+class FilesystemScanner(object):
+	"""
+	Provides functionality for efficiently scanning directory trees in order to detect changes to their contents
+	"""
+	
+	@staticmethod
+	def statTree(directory):
+		"""
+		Returns a list of (path, size, mtime) tuples for all files under the specified directory, or an empty list if it does not exist
+		"""
+		files = []
+		pending = [directory]
+		while len(pending) > 0:
+			for entry in FilesystemScanner._listEntries(pending.pop()):
+				try:
+					if entry.is_dir():
+						pending.append(entry.path)
+					else:
+						details = entry.stat()
+						files.append((entry.path, details.st_size, details.st_mtime_ns))
+				except OSError:
+					pass
+		
+		return files
+	
+	@staticmethod
+	def digest(directories=[], files=[], extra=[]):
+		"""
+		Computes a digest of the sizes and modification times of all files under the specified directories and of the specified
+		individual files, along with any extra strings. Directories are scanned in parallel, since this is dominated by I/O latency.
+		"""
+		
+		# Scan the directory trees, using a thread for each tree when there is more than one
+		entries = []
+		if len(directories) > 1:
+			from concurrent.futures import ThreadPoolExecutor
+			with ThreadPoolExecutor(max_workers=min(len(directories), 16)) as executor:
+				for tree in executor.map(FilesystemScanner.statTree, directories):
+					entries.extend(tree)
+		else:
+			for directory in directories:
+				entries.extend(FilesystemScanner.statTree(directory))
+		
+		# Stat the individual files, recording any files that are missing so their creation is detected
+		for file in files:
+			try:
+				details = os.stat(file)
+				entries.append((file, details.st_size, details.st_mtime_ns))
+			except OSError:
+				entries.append((file, None, None))
+		
+		hash = hashlib.sha256()
+		for value in extra:
+			hash.update('{}\n'.format(value).encode('utf-8'))
+		for entry in sorted(entries, key = lambda entry: entry[0]):
+			hash.update('{}|{}|{}\n'.format(*entry).encode('utf-8'))
+		
+		return hash.hexdigest()
+	
+	
+	# "Private" methods
+	
+	@staticmethod
+	def _listEntries(directory):
+		try:
+			return list(os.scandir(directory))
+		except OSError:
+			return []
@@ -0,0 +1,187 @@
+import math, os, platform
+
+# The amount of memory (in gigabytes) that each parallel compile action is assumed to require, which matches the default used by UnrealBuildTool
+DEFAULT_MEMORY_PER_ACTION_GB = 1.5
+
+# cgroup v1 reports an "unlimited" memory limit as a very large number rather than a sentinel value
+CGROUP_UNLIMITED_THRESHOLD = 2 ** 60
+
+class HostResources(object):
+	"""
+	Provides functionality for querying the compute resources of the host system, for sizing concurrent builds
+	"""
+	
+	@staticmethod
+	def cpuCount():
+		"""
+		Returns the number of logical CPU cores that are available to this process, respecting any cgroup CPU quota (e.g. in a container)
+		"""
+		cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+		quota = HostResources._cgroupCpuQuota()
+		return max(1, min(cores, quota)) if quota is not None else cores
+	
+	@staticmethod
+	def availableMemory():
+		"""
+		Returns the amount of physical memory (in bytes) that is currently available, or None if it cannot be determined
+		"""
+		try:
+			if platform.system() == 'Windows':
+				import ctypes
+				class MEMORYSTATUSEX(ctypes.Structure):
+					_fields_ = [
+						('dwLength', ctypes.c_ulong),
+						('dwMemoryLoad', ctypes.c_ulong),
+						('ullTotalPhys', ctypes.c_ulonglong),
+						('ullAvailPhys', ctypes.c_ulonglong),
+						('ullTotalPageFile', ctypes.c_ulonglong),
+						('ullAvailPageFile', ctypes.c_ulonglong),
+						('ullTotalVirtual', ctypes.c_ulonglong),
+						('ullAvailVirtual', ctypes.c_ulonglong),
+						('ullAvailExtendedVirtual', ctypes.c_ulonglong)
+					]
+				status = MEMORYSTATUSEX()
+				status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+				ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+				return status.ullAvailPhys
+			
+			elif platform.system() == 'Darwin':
+				# macOS does not report available memory in a straightforward manner, so we use the total physical memory
+				from .Utility import Utility
+				return int(Utility.capture(['sysctl', '-n', 'hw.memsize'], raiseOnError=True).stdout.strip())
+			
+			else:
+				# Respect the cgroup memory limit (e.g. in a container) if it is lower than the memory available to the host
+				available = None
+				with open('/proc/meminfo', 'r') as meminfo:
+					for line in meminfo:
+						if line.startswith('MemAvailable:'):
+							available = int(line.split()[1]) * 1024
+				
+				cgroupAvailable = HostResources._cgroupAvailableMemory()
+				return min([value for value in [available, cgroupAvailable] if value is not None], default=None)
+		
+		except Exception:
+			pass
+		
+		return None
+	
+	@staticmethod
+	def memoryPerAction():
+		"""
+		Returns the amount of memory (in bytes) that each parallel compile action is assumed to require,
+		which can be overridden using the UE4CLI_MEMORY_PER_ACTION_GB environment variable
+		"""
+		try:
+			gigabytes = float(os.environ.get('UE4CLI_MEMORY_PER_ACTION_GB', DEFAULT_MEMORY_PER_ACTION_GB))
+		except ValueError:
+			gigabytes = DEFAULT_MEMORY_PER_ACTION_GB
+		
+		return max(gigabytes, 0.1) * 1024 * 1024 * 1024
+	
+	@staticmethod
+	def maxParallelActions(memoryPerAction = None):
+		"""
+		Returns the total number of compile actions that the host can run in parallel without exhausting its CPU cores or memory
+		"""
+		memoryPerAction = memoryPerAction if memoryPerAction is not None else HostResources.memoryPerAction()
+		actions = HostResources.cpuCount()
+		memory = HostResources.availableMemory()
+		if memory is not None:
+			actions = min(actions, int(memory // memoryPerAction))
+		
+		return max(1, actions)
+	
+	@staticmethod
+	def planJobs(numJobs, maxJobs = None, minActionsPerJob = 4):
+		"""
+		Determines how many of the specified number of jobs to run concurrently and how many parallel actions to allow each job,
+		such that the total number of parallel actions fits within the host's resources. Returns a tuple of (concurrentJobs, actionsPerJob).
+		"""
+		totalActions = HostResources.maxParallelActions()
+		
+		# Unless the number of concurrent jobs was specified, run as many jobs as we can while still giving each job a useful number of actions
+		concurrentJobs = maxJobs if maxJobs is not None else max(1, totalActions // minActionsPerJob)
+		concurrentJobs = max(1, min(concurrentJobs, numJobs))
+		return (concurrentJobs, max(1, totalActions // concurrentJobs))
+	
+	
+	# "Private" methods
+	
+	@staticmethod
+	def _cgroupAvailableMemory():
+		"""
+		Returns the memory available under this process's cgroup memory limit, or None if there is no limit
+		"""
+		
+		# cgroup v2 exposes `memory.max`, whereas cgroup v1 exposes `memory.limit_in_bytes`
+		limit = HostResources._readCgroupFile('memory', 'memory.max')
+		usage = HostResources._readCgroupFile('memory', 'memory.current')
+		inactiveKey = 'inactive_file'
+		if limit is None:
+			limit = HostResources._readCgroupFile('memory', 'memory.limit_in_bytes')
+			usage = HostResources._readCgroupFile('memory', 'memory.usage_in_bytes')
+			inactiveKey = 'total_inactive_file'
+		if limit is None or limit == 'max' or int(limit) >= CGROUP_UNLIMITED_THRESHOLD:
+			return None
+		
+		# Reclaimable page cache is included in the usage figure, so exclude it (as container runtimes do when computing the working set)
+		usage = int(usage) if usage is not None else 0
+		stat = HostResources._readCgroupFile('memory', 'memory.stat') or ''
+		for line in stat.splitlines():
+			fields = line.split()
+			if len(fields) == 2 and fields[0] == inactiveKey:
+				usage = max(0, usage - int(fields[1]))
+		
+		return max(0, int(limit) - usage)
+	
+	@staticmethod
+	def _cgroupCpuQuota():
+		"""
+		Returns the number of CPU cores permitted by this process's cgroup CPU quota, or None if there is no quota
+		"""
+		
+		# cgroup v2 exposes `cpu.max` as "QUOTA PERIOD", whereas cgroup v1 exposes the quota and period as separate files
+		cpuMax = HostResources._readCgroupFile('cpu', 'cpu.max')
+		if cpuMax is not None:
+			fields = cpuMax.split()
+			quota, period = (fields[0], fields[1]) if len(fields) == 2 else ('max', None)
+		else:
+			quota = HostResources._readCgroupFile('cpu', 'cpu.cfs_quota_us')
+			period = HostResources._readCgroupFile('cpu', 'cpu.cfs_period_us')
+		
+		if quota is None or period is None or quota == 'max' or int(quota) <= 0 or int(period) <= 0:
+			return None
+		return max(1, int(math.ceil(int(quota) / int(period))))
+	
+	@staticmethod
+	def _readCgroupFile(controller, filename):
+		"""
+		Reads the specified file for this process's cgroup under the specified controller, returning None if it does not exist
+		"""
+		
+		# Determine the cgroup paths for this process, which are relative to the mount point of each hierarchy
+		# (Inside a container, the cgroup is typically mounted at the root of the hierarchy, so we fall back to that)
+		candidates = []
+		try:
+			with open('/proc/self/cgroup', 'r') as cgroups:
+				for line in cgroups:
+					fields = line.strip().split(':', 2)
+					if len(fields) != 3:
+						continue
+					if fields[1] == '':
+						candidates.extend([os.path.join('/sys/fs/cgroup' + fields[2], filename), os.path.join('/sys/fs/cgroup', filename)])
+					elif controller in fields[1].split(','):
+						mount = os.path.join('/sys/fs/cgroup', fields[1])
+						candidates.extend([os.path.join(mount + fields[2], filename), os.path.join(mount, filename)])
+		except OSError:
+			return None
+		
+		for candidate in candidates:
+			try:
+				with open(candidate, 'r') as f:
+					return f.read().strip()
+			except OSError:
+				pass
+		
+		return None
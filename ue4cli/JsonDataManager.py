@@ -1,6 +1,7 @@
 from .UnrealManagerException import UnrealManagerException
+from .FileLock import FileLock
 from .Utility import Utility
-import json, os, platform
+import json, os, platform, time
 
 class JsonDataManager(object):
 	"""
@@ -27,6 +28,8 @@ class JsonDataManager(object):
 		"""
 		Retrieves the entire data dictionary
 		"""
+		
+		# Since writes are performed by atomically replacing the file, readers never need to acquire the lock
 		if os.path.exists(self.jsonFile):
 			try:
 				return json.loads(Utility.readFile(self.jsonFile))
@@ -39,19 +42,65 @@ class JsonDataManager(object):
 		"""
 		Sets the value for the specified dictionary key
 		"""
-		data = self.getDictionary()
-		data[key] = value
-		self.setDictionary(data)
+		self.setKeys({key: value})
+	
+	def setKeys(self, values):
+		"""
+		Sets the values for multiple dictionary keys as a single atomic update
+		"""
+		with self._lock():
+			data = self.getDictionary()
+			data.update(values)
+			self._writeDictionary(data)
 	
 	def setDictionary(self, data):
 		"""
 		Overwrites the entire dictionary
 		"""
+		with self._lock():
+			self._writeDictionary(data)
+	
+	
+	# "Private" methods
+	
+	def _lock(self):
+		"""
+		Returns the interprocess lock that serialises updates to the JSON file
+		"""
+		return FileLock(self.jsonFile + '.lock')
+	
+	def _writeDictionary(self, data):
+		"""
+		Writes the dictionary to a temporary file and then atomically replaces the JSON file with it
+		"""
 		
 		# Create the directory containing the JSON file if it doesn't already exist
 		jsonDir = os.path.dirname(self.jsonFile)
 		if os.path.exists(jsonDir) == False:
-			os.makedirs(jsonDir)
+			os.makedirs(jsonDir, exist_ok=True)
+		
+		# Write the data to a temporary file in the same directory, so that it resides on the same filesystem
+		import tempfile
+		handle, tempFile = tempfile.mkstemp(dir=jsonDir, prefix=os.path.basename(self.jsonFile) + '.', suffix='.tmp')
+		try:
 		
-		# Store the dictionary
-		Utility.writeFile(self.jsonFile, json.dumps(data))
+			# Preserve the permissions of any existing file, since mkstemp() creates files that are only accessible by the owner
+			os.chmod(tempFile, os.stat(self.jsonFile).st_mode if os.path.exists(self.jsonFile) else 0o644)
+			with os.fdopen(handle, 'wb') as f:
+				f.write(json.dumps(data).encode('utf-8'))
+			
+			# Under Windows, the replacement will fail if another process has the JSON file open for reading, so retry briefly
+			for attempt in range(100):
+				try:
+					os.replace(tempFile, self.jsonFile)
+					break
+				except PermissionError:
+					if platform.system() != 'Windows' or attempt == 99:
+						raise
+					time.sleep(0.01)
+		except:
+			try:
+				os.unlink(tempFile)
+			except OSError:
+				pass
+			raise
@@ -0,0 +1,126 @@
+from .UnrealManagerException import UnrealManagerException
+import json
+
+# The number of characters read from the export file at a time
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+class JsonExportReader(object):
+	"""
+	Provides functionality for incrementally reading the modules from an UnrealBuildTool JSON export,
+	without holding the entire export (or every module it contains) in memory at once
+	"""
+	
+	def __init__(self, filename, chunkSize = DEFAULT_CHUNK_SIZE):
+		"""
+		Creates a new JsonExportReader instance for the specified export file
+		"""
+		self.filename = filename
+		self.chunkSize = chunkSize
+		self._decoder = json.JSONDecoder()
+		self._file = None
+		self._buffer = ''
+		self._pos = 0
+		self._eof = False
+	
+	def modules(self, fields = None):
+		"""
+		Yields each of the modules from the `Modules` object of the export in turn, retaining only the specified fields if any are specified
+		"""
+		with open(self.filename, 'r', encoding='utf-8-sig') as self._file:
+			self._buffer = ''
+			self._pos = 0
+			self._eof = False
+			
+			# Iterate over the keys of the top-level object, skipping the values of everything other than the `Modules` object
+			self._expect('{')
+			for key in self._keys():
+				if key != 'Modules':
+					self._decodeValue()
+					continue
+				
+				# Decode each module individually, so we only ever hold a single complete module in memory
+				self._expect('{')
+				for name in self._keys():
+					module = self._decodeValue()
+					if fields is not None and isinstance(module, dict):
+						module = {field: module[field] for field in fields if field in module}
+					yield module
+	
+	
+	# "Private" methods
+	
+	def _keys(self):
+		"""
+		Yields the keys of the object whose opening brace has just been consumed, leaving the position at the start of each value
+		"""
+		if self._peek() == '}':
+			self._pos += 1
+			return
+		
+		while True:
+			key = self._decodeValue()
+			if isinstance(key, str) == False:
+				raise self._error('expected an object key')
+			self._expect(':')
+			yield key
+			
+			# Consume the separator following the value, which the caller has consumed by this point
+			delimiter = self._peek()
+			self._pos += 1
+			if delimiter == '}':
+				return
+			elif delimiter != ',':
+				raise self._error('expected "," or "}"')
+	
+	def _decodeValue(self):
+		"""
+		Decodes the JSON value at the current position, reading more data from the file as needed
+		"""
+		self._peek()
+		while True:
+			try:
+				value, end = self._decoder.raw_decode(self._buffer, self._pos)
+				
+				# A number that ends at the end of the buffer may continue in the next chunk, so only accept it at the end of the file
+				if end < len(self._buffer) or self._eof == True:
+					self._pos = end
+					return value
+			except ValueError:
+				if self._eof == True:
+					raise self._error('malformed JSON value')
+			
+			# The value is incomplete, so read more data and try again, doubling the read size for values larger than the chunk size
+			self._read(max(self.chunkSize, len(self._buffer) - self._pos))
+	
+	def _expect(self, character):
+		"""
+		Consumes the specified structural character, skipping any preceding whitespace
+		"""
+		if self._peek() != character:
+			raise self._error('expected "{}"'.format(character))
+		self._pos += 1
+	
+	def _peek(self):
+		"""
+		Skips any whitespace and returns the next character, reading more data from the file as needed
+		"""
+		while True:
+			while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+				self._pos += 1
+			if self._pos < len(self._buffer):
+				return self._buffer[self._pos]
+			if self._eof == True:
+				raise self._error('unexpected end of file')
+			self._read(self.chunkSize)
+	
+	def _read(self, size):
+		"""
+		Discards the data we have already consumed and appends the next chunk of data from the file to the buffer
+		"""
+		chunk = self._file.read(size)
+		self._buffer = self._buffer[self._pos:] + chunk
+		self._pos = 0
+		self._eof = len(chunk) == 0
+	
+	def _error(self, message):
+		return UnrealManagerException('failed to parse UnrealBuildTool JSON export "{}": {}'.format(self.filename, message))
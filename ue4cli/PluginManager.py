@@ -1,5 +1,12 @@
-from inspect import signature
-import pkg_resources
+from .CachedDataManager import CachedDataManager
+from .UnrealManagerException import UnrealManagerException
+import importlib, os, sys
+
+# The entry point group that ue4cli plugins register themselves under
+PLUGIN_ENTRY_POINT_GROUP = 'ue4cli.plugins'
+
+# The filename suffixes of the metadata that identifies a directory as holding installed distributions
+DISTRIBUTION_SUFFIXES = ('.dist-info', '.egg-info', '.egg-link', '.pth')
 
 class PluginManager:
 	"""
@@ -12,23 +19,135 @@ class PluginManager:
 		Returns the list of valid ue4cli plugins
 		"""
 		
-		# Retrieve the list of detected entry points in the ue4cli.plugins group
-		plugins = {
-			entry_point.name: entry_point.load()
-			for entry_point
-			in pkg_resources.iter_entry_points('ue4cli.plugins')
-		}
-		
-		# Filter out any invalid plugins
-		plugins = {
-			name: plugins[name]
-			for name in plugins
-			if
-				'action' in plugins[name] and
-				'description' in plugins[name] and
-				'args' in plugins[name] and
-				callable(plugins[name]['action']) == True and
-				len(signature(plugins[name]['action']).parameters) == 2
-		}
+		# Load each of the plugins listed in the index, filtering out any that could not be loaded
+		plugins = {}
+		for name in PluginManager.getPluginIndex():
+			try:
+				plugins[name] = PluginManager.loadPlugin(name)
+			except UnrealManagerException:
+				pass
 		
 		return plugins
+	
+	@staticmethod
+	def getPluginIndex():
+		"""
+		Returns the name, description and args string for each valid ue4cli plugin, without loading any plugin modules
+		"""
+		
+		# If the set of installed distributions hasn't changed since we last built the index, use the cached index
+		fingerprint = PluginManager._distributionsFingerprint()
+		cached = CachedDataManager.getHostDataKey('PluginIndex')
+		if cached is not None and cached['fingerprint'] == fingerprint:
+			return cached['plugins']
+		
+		# Load each of the detected plugins to validate it and retrieve its details
+		index = {}
+		for name, value in PluginManager._getEntryPoints():
+			try:
+				plugin = PluginManager._loadEntryPoint(value)
+			except Exception:
+				continue
+			if PluginManager._isValid(plugin) == True:
+				index[name] = {
+					'entryPoint': value,
+					'description': plugin['description'],
+					'args': plugin['args']
+				}
+		
+		CachedDataManager.setHostDataKey('PluginIndex', {'fingerprint': fingerprint, 'plugins': index})
+		return index
+	
+	@staticmethod
+	def loadPlugin(name):
+		"""
+		Loads the plugin with the specified name
+		"""
+		index = PluginManager.getPluginIndex()
+		if name not in index:
+			raise UnrealManagerException('unrecognised plugin "{}"'.format(name))
+		
+		try:
+			plugin = PluginManager._loadEntryPoint(index[name]['entryPoint'])
+		except Exception as e:
+			raise UnrealManagerException('failed to load plugin "{}": {}'.format(name, e))
+		
+		if PluginManager._isValid(plugin) == False:
+			raise UnrealManagerException('plugin "{}" is not a valid ue4cli plugin'.format(name))
+		
+		return plugin
+	
+	
+	# "Private" methods
+	
+	@staticmethod
+	def _getEntryPoints():
+		"""
+		Returns the (name, value) pair for each entry point in the ue4cli.plugins group
+		"""
+		try:
+			from importlib.metadata import entry_points
+		except ImportError:
+		
+			# Prior to Python 3.8 we need to fall back to pkg_resources, which is considerably slower to import
+			import pkg_resources
+			return [
+				(entry_point.name, '{}:{}'.format(entry_point.module_name, '.'.join(entry_point.attrs)))
+				for entry_point
+				in pkg_resources.iter_entry_points(PLUGIN_ENTRY_POINT_GROUP)
+			]
+		
+		# Python 3.10 introduced a selection interface and deprecated the dictionary interface
+		detected = entry_points()
+		group = detected.select(group=PLUGIN_ENTRY_POINT_GROUP) if hasattr(detected, 'select') else detected.get(PLUGIN_ENTRY_POINT_GROUP, [])
+		return [(entry_point.name, entry_point.value) for entry_point in group]
+	
+	@staticmethod
+	def _loadEntryPoint(value):
+		"""
+		Imports the object referenced by an entry point value of the form `module:attr`
+		"""
+		moduleName, _, attrs = value.partition(':')
+		loaded = importlib.import_module(moduleName.strip())
+		for attr in attrs.split('[')[0].strip().split('.'):
+			if attr != '':
+				loaded = getattr(loaded, attr)
+		
+		return loaded
+	
+	@staticmethod
+	def _isValid(plugin):
+		"""
+		Determines if a loaded plugin provides the details we require
+		"""
+		from inspect import signature
+		return (
+			isinstance(plugin, dict) and
+			'action' in plugin and
+			'description' in plugin and
+			'args' in plugin and
+			callable(plugin['action']) == True and
+			len(signature(plugin['action']).parameters) == 2
+		)
+	
+	@staticmethod
+	def _distributionsFingerprint():
+		"""
+		Computes a fingerprint for the set of installed distributions, based on the modification times of the sys.path directories that hold distributions
+		"""
+		
+		# Installing, upgrading or removing a distribution adds or removes entries in its site-packages directory, which updates the directory's mtime
+		# (We ignore the current working directory and any other directories that do not hold distribution metadata, since their contents change
+		# frequently and they cannot contain installed plugins, so including them would needlessly invalidate the index)
+		fingerprint = [sys.executable]
+		cwd = os.getcwd()
+		for path in sys.path:
+			if path == '' or os.path.abspath(path) == cwd:
+				continue
+			try:
+				if any([entry.endswith(DISTRIBUTION_SUFFIXES) for entry in os.listdir(path)]) == True:
+					fingerprint.append([path, os.stat(path).st_mtime])
+			except OSError:
+				pass
+		
+		return fingerprint
@@ -0,0 +1,152 @@
+from .UnrealManagerException import UnrealManagerException
+from .JsonDataManager import JsonDataManager
+import os, time
+
+# The directories inside projects and plugins that hold build artifacts or content rather than nested plugins,
+# which we never descend into when discovering plugins since they can be extremely large
+PRUNED_DIRECTORIES = ['Binaries', 'Config', 'Content', 'DerivedDataCache', 'Intermediate', 'Resources', 'Saved', 'Source']
+
+# Directory modification times within this many nanoseconds of a scan may not reflect changes made during the scan,
+# so an index containing any such directories is not reused (since changes made in the same timestamp tick would be missed)
+RACY_MTIME_WINDOW = 2 * 1000 * 1000 * 1000
+
+class ProjectIndex(object):
+	"""
+	Provides functionality for indexing the descriptors, plugins and modules of an Unreal project or plugin with a single pruned
+	walk of its directory tree. The index is cached and reused for as long as the modification times of the walked directories
+	are unchanged, since adding, removing or renaming any file or subdirectory updates the modification time of its parent.
+	"""
+	
+	# The in-memory copies of the indices we have built or loaded, keyed by root directory
+	_memory = {}
+	
+	@staticmethod
+	def forDirectory(dir):
+		"""
+		Returns the index for the specified directory, which is a dictionary with the following keys:
+		
+		- `root`: the absolute path of the directory
+		- `projectDescriptors`: the .uproject files in the directory
+		- `pluginDescriptors`: the .uplugin files in the directory
+		- `hasSource`: whether the directory contains a `Source` subdirectory
+		- `modules`: the .Build.cs files under the `Source` subdirectory
+		- `plugins`: a list of dictionaries (with the keys `root`, `descriptor`, `hasSource` and `modules`)
+		  for each of the plugins under the `Plugins` subdirectory, including plugins nested inside other plugins
+		"""
+		root = os.path.abspath(dir)
+		
+		# Use our in-memory copy of the index if we have one, falling back to the copy stored alongside the project or plugin
+		for index in [ProjectIndex._memory.get(root, None), ProjectIndex._load(root)]:
+			if index is not None and ProjectIndex._isCurrent(index) == True:
+				ProjectIndex._memory[root] = index
+				return index
+		
+		# Walk the directory tree, and only store the index if it is for a project or plugin and none of the directories are racily clean
+		scanStart = time.time_ns() if hasattr(time, 'time_ns') else int(time.time() * 1000 * 1000 * 1000)
+		index = ProjectIndex._scan(root)
+		if len([mtime for mtime in index['directories'].values() if mtime is None or mtime >= scanStart - RACY_MTIME_WINDOW]) == 0:
+			ProjectIndex._memory[root] = index
+			if len(index['projectDescriptors']) > 0 or len(index['pluginDescriptors']) > 0:
+				try:
+					JsonDataManager(ProjectIndex._indexFile(root)).setDictionary(index)
+				except OSError:
+					pass
+		
+		return index
+	
+	
+	# "Private" methods
+	
+	@staticmethod
+	def _indexFile(root):
+		return os.path.join(root, 'Intermediate', 'ue4cli', 'ProjectIndex.json')
+	
+	@staticmethod
+	def _load(root):
+		try:
+			index = JsonDataManager(ProjectIndex._indexFile(root)).getDictionary()
+			return index if index.get('root', None) == root else None
+		except (OSError, UnrealManagerException):
+			return None
+	
+	@staticmethod
+	def _isCurrent(index):
+		"""
+		Determines if none of the directories walked to build the specified index have been modified since it was built
+		"""
+		for directory, mtime in index['directories'].items():
+			try:
+				if os.stat(directory).st_mtime_ns != mtime:
+					return False
+			except OSError:
+				return False
+		
+		return True
+	
+	@staticmethod
+	def _scan(root):
+		"""
+		Walks the directory tree for the specified project or plugin and builds its index
+		"""
+		directories = {}
+		entries = ProjectIndex._listEntries(root, directories)
+		index = {
+			'root': root,
+			'directories': directories,
+			'projectDescriptors': sorted([os.path.realpath(entry.path) for entry in entries if entry.name.endswith('.uproject') and entry.is_file()]),
+			'pluginDescriptors': sorted([os.path.realpath(entry.path) for entry in entries if entry.name.endswith('.uplugin') and entry.is_file()]),
+			'hasSource': os.path.isdir(os.path.join(root, 'Source')),
+			'modules': ProjectIndex._findModules(os.path.join(root, 'Source'), directories),
+			'plugins': []
+		}
+		
+		# Find each of the plugins under the `Plugins` subdirectory, without descending into their artifact and content directories
+		pending = [os.path.join(root, 'Plugins')] if os.path.isdir(os.path.join(root, 'Plugins')) else []
+		while len(pending) > 0:
+			current = pending.pop()
+			entries = ProjectIndex._listEntries(current, directories)
+			
+			# A directory containing a plugin descriptor is a plugin root
+			descriptors = sorted([entry.path for entry in entries if entry.name.endswith('.uplugin') and entry.is_file()])
+			if len(descriptors) > 0:
+				index['plugins'].append({
+					'root': current,
+					'descriptor': descriptors[0],
+					'hasSource': os.path.isdir(os.path.join(current, 'Source')),
+					'modules': ProjectIndex._findModules(os.path.join(current, 'Source'), directories)
+				})
+			
+			for entry in entries:
+				if entry.is_dir() and entry.name.startswith('.') == False and (len(descriptors) == 0 or entry.name not in PRUNED_DIRECTORIES):
+					pending.append(entry.path)
+		
+		index['plugins'] = sorted(index['plugins'], key = lambda plugin: plugin['root'])
+		return index
+	
+	@staticmethod
+	def _findModules(sourceDir, directories):
+		"""
+		Returns the .Build.cs files under the specified `Source` directory, recording each directory that was walked
+		"""
+		modules = []
+		pending = [sourceDir] if os.path.isdir(sourceDir) else []
+		while len(pending) > 0:
+			for entry in ProjectIndex._listEntries(pending.pop(), directories):
+				if entry.is_dir():
+					pending.append(entry.path)
+				elif entry.name.endswith('.Build.cs'):
+					modules.append(entry.path)
+		
+		return sorted(modules)
+	
+	@staticmethod
+	def _listEntries(directory, directories):
+		"""
+		Lists the entries of the specified directory, recording its modification time
+		"""
+		try:
+			directories[directory] = os.stat(directory).st_mtime_ns
+			return list(os.scandir(directory))
+		except OSError:
+			directories[directory] = None
+			return []
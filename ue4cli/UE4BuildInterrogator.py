@@ -1,11 +1,31 @@
 from .ThirdPartyLibraryDetails import ThirdPartyLibraryDetails
 from .UnrealManagerException import UnrealManagerException
 from .CachedDataManager import CachedDataManager
+from .FileLock import FileLock
+from .JsonExportReader import JsonExportReader
 from .Utility import Utility
-import json, os, platform, shutil, tempfile
+import os, platform, shutil, tempfile, threading, time
+
+# The module fields that we retain when indexing the third-party library modules from the UBT output
+MODULE_FIELDS = [
+	'Directory',
+	'PublicSystemLibraries',
+	'PublicAdditionalLibraries',
+	'PublicLibraryPaths',
+	'PublicSystemIncludePaths',
+	'PublicIncludePaths',
+	'PrivateIncludePaths',
+	'PublicDefinitions'
+]
+
+# The module fields that we extract from the UBT output, which includes the legacy fields that are migrated during normalisation
+EXPORT_FIELDS = ['Name'] + MODULE_FIELDS + ['PublicSystemLibraryPaths', 'PublicLibraries']
 
 class UE4BuildInterrogator(object):
 	
+	# Serialises UBT runs that rename the sentinel file within this process (the lock file only serialises them across processes)
+	_sentinelLock = threading.Lock()
+	
 	def __init__(self, engineRoot, engineVersion, engineVersionHash, runUBTFunc):
 		self.engineRoot = os.path.realpath(engineRoot)
 		self.engineSourceDir = 'Engine/Source/'
@@ -13,12 +33,26 @@ class UE4BuildInterrogator(object):
 		self.engineVersionHash = engineVersionHash
 		self.runUBTFunc = runUBTFunc
 	
+	@staticmethod
+	def cacheQualifiers(engineRoot, platformIdentifier, configuration):
+		"""
+		Returns the qualifiers that identify the cached module index for the specified platform and configuration
+		"""
+		return [platformIdentifier, configuration, 'sentinel' if UE4BuildInterrogator._shouldRenameSentinel(engineRoot) == True else 'default']
+	
+	def populateCache(self, platformIdentifier, configuration, ubtArgs = []):
+		"""
+		Populates the cached module index for the specified platform and configuration, returning False if it was already cached
+		"""
+		index, populated = self._getOrPopulateThirdPartyLibs(platformIdentifier, configuration, ubtArgs)
+		return populated
+	
 	def list(self, platformIdentifier, configuration, libOverrides = {}):
 		"""
 		Returns the list of supported UE4-bundled third-party libraries
 		"""
 		modules = self._getThirdPartyLibs(platformIdentifier, configuration)
-		return sorted([m['Name'] for m in modules] + [key for key in libOverrides])
+		return sorted([name for name in modules] + [key for key in libOverrides])
 	
 	def interrogate(self, platformIdentifier, configuration, libraries, libOverrides = {}):
 		"""
@@ -32,59 +66,21 @@ class UE4BuildInterrogator(object):
 		details = ThirdPartyLibraryDetails()
 		if len(libModules) > 0:
 			
-			# Retrieve the list of third-party library modules from UnrealBuildTool
-			modules = self._getThirdPartyLibs(platformIdentifier, configuration)
+			# Retrieve the index of normalised third-party library modules from UnrealBuildTool
+			index = self._getThirdPartyLibs(platformIdentifier, configuration)
 			
-			# Filter the list of modules to include only those that were requested
-			modules = [m for m in modules if m['Name'] in libModules]
+			# Look up the modules that were requested, preserving the order in which they appeared in the UBT output
+			modules = sorted([index[name] for name in set(libModules) if name in index], key = lambda m: m['Order'])
 			
 			# Emit a warning if any of the requested modules are not supported
-			names = [m['Name'] for m in modules]
-			unsupported = ['"' + m + '"' for m in libModules if m not in names]
+			unsupported = ['"' + m + '"' for m in libModules if m not in index]
 			if len(unsupported) > 0:
 				Utility.printStderr('Warning: unsupported libraries ' + ','.join(unsupported))
 			
-			# Iterate over the modules and perform any necessary transformations
-			for module in modules:
-				
-				# In Unreal Engine 4.24.0 the `PublicLibraryPaths` key was removed and the `PublicSystemLibraryPaths` key was added to provide
-				# backwards-compatibility with the legacy search path behaviour (with a warning emitted when a qualified path is not specified)
-				# (See <https://docs.unrealengine.com/en-US/Support/Builds/ReleaseNotes/4_24/index.html#unrealbuildtool> for details)
-				if 'PublicSystemLibraryPaths' in module and 'PublicLibraryPaths' not in module:
-					module['PublicLibraryPaths'] = module['PublicSystemLibraryPaths']
-				
-				# In Unreal Engine 4.26.0, the `PublicAdditionalLibraries` key was removed from JSON output and entries are now split into `PublicLibraries` and `PublicSystemLibraries`
-				# based on whether or not they are fully-qualified paths. The `PublicSystemLibraryPaths` key is used for resolving entries in `PublicSystemLibraries` as before.
-				# (See this change for the implementation details: <https://github.com/EpicGames/UnrealEngine/commit/d6d7c939e5b424bf128769bd2f027f35430c0db4>)
-				if 'PublicAdditionalLibraries' not in module and 'PublicLibraries' in module:
-					module['PublicAdditionalLibraries'] = module['PublicLibraries']
-				
-				# Prior to the strict qualified/system split in Unreal Engine 4.26.0, some libraries were listed as just the filename without the leading directory (especially prevalent under Windows)
-				if 'PublicLibraries' not in module and len(module['PublicAdditionalLibraries']) > 0 and len(module['PublicLibraryPaths']) > 0:
-					libPath = (self._absolutePaths(module['PublicLibraryPaths']))[0]
-					libs = list([lib.replace('\\', '/') for lib in module['PublicAdditionalLibraries']])
-					libs = list([os.path.join(libPath, lib) if '/' not in lib else lib for lib in libs])
-					module['PublicAdditionalLibraries'] = libs
-				
-				# Older versions of the Unreal Engine don't list system libraries separately, so make sure we always have a list even if it's empty
-				if 'PublicSystemLibraries' not in module:
-					module['PublicSystemLibraries'] = []
-			
-			# Flatten the lists of paths
-			fields = [
-				'Directory',
-				'PublicSystemLibraries',
-				'PublicAdditionalLibraries',
-				'PublicLibraryPaths',
-				'PublicSystemIncludePaths',
-				'PublicIncludePaths',
-				'PrivateIncludePaths',
-				'PublicDefinitions'
-			]
+			# Flatten the lists of paths (which were converted to absolute paths when the index was populated)
 			flattened = {}
-			for field in fields:
-				transform = (lambda l: self._absolutePaths(l)) if field not in ['Definitions', 'PublicSystemLibraries'] else None
-				flattened[field] = self._flatten(field, modules, transform)
+			for field in MODULE_FIELDS:
+				flattened[field] = self._flatten(field, modules)
 			
 			# Compose the prefix directories from the module root directories, the header and library paths, and their direct parent directories
 			libraryDirectories = flattened['PublicLibraryPaths']
@@ -92,7 +88,7 @@ class UE4BuildInterrogator(object):
 			modulePaths        = flattened['Directory']
 			prefixDirectories  = list(set(flattened['Directory'] + headerDirectories + libraryDirectories + [os.path.dirname(p) for p in headerDirectories + libraryDirectories]))
 			
-			# Wrap the results in a ThirdPartyLibraryDetails instance, converting any relative directory paths into absolute ones
+			# Wrap the results in a ThirdPartyLibraryDetails instance
 			details = ThirdPartyLibraryDetails(
 				prefixDirs  = prefixDirectories,
 				includeDirs = headerDirectories,
@@ -120,6 +116,54 @@ class UE4BuildInterrogator(object):
 		stripped = [p.replace('../', '') if p.startswith('../') else p for p in slashes]
 		return list([p if (os.path.isabs(p) or '/' not in p) else os.path.join(self.engineRoot, self.engineSourceDir, p) for p in stripped])
 	
+	@staticmethod
+	def _shouldRenameSentinel(engineRoot):
+		"""
+		Determines if the `InstalledBuild.txt` sentinel file should be temporarily renamed when running UBT
+		"""
+		
+		# The sentinel file is also considered present while it is renamed by a UBT run in progress in another thread or process
+		sentinelFile = os.path.join(engineRoot, 'Engine', 'Build', 'InstalledBuild.txt')
+		sentinelPresent = os.path.exists(sentinelFile) or os.path.exists(sentinelFile + '.bak')
+		return sentinelPresent and os.environ.get('UE4CLI_SENTINEL_RENAME', '0') == '1'
+	
+	def _normaliseModule(self, module, order):
+		"""
+		Applies any necessary transformations to a module from the UBT output and retains only the fields we use
+		"""
+		
+		# In Unreal Engine 4.24.0 the `PublicLibraryPaths` key was removed and the `PublicSystemLibraryPaths` key was added to provide
+		# backwards-compatibility with the legacy search path behaviour (with a warning emitted when a qualified path is not specified)
+		# (See <https://docs.unrealengine.com/en-US/Support/Builds/ReleaseNotes/4_24/index.html#unrealbuildtool> for details)
+		if 'PublicSystemLibraryPaths' in module and 'PublicLibraryPaths' not in module:
+			module['PublicLibraryPaths'] = module['PublicSystemLibraryPaths']
+		
+		# In Unreal Engine 4.26.0, the `PublicAdditionalLibraries` key was removed from JSON output and entries are now split into `PublicLibraries` and `PublicSystemLibraries`
+		# based on whether or not they are fully-qualified paths. The `PublicSystemLibraryPaths` key is used for resolving entries in `PublicSystemLibraries` as before.
+		# (See this change for the implementation details: <https://github.com/EpicGames/UnrealEngine/commit/d6d7c939e5b424bf128769bd2f027f35430c0db4>)
+		if 'PublicAdditionalLibraries' not in module and 'PublicLibraries' in module:
+			module['PublicAdditionalLibraries'] = module['PublicLibraries']
+		
+		# Prior to the strict qualified/system split in Unreal Engine 4.26.0, some libraries were listed as just the filename without the leading directory (especially prevalent under Windows)
+		if 'PublicLibraries' not in module and len(module['PublicAdditionalLibraries']) > 0 and len(module['PublicLibraryPaths']) > 0:
+			libPath = (self._absolutePaths(module['PublicLibraryPaths']))[0]
+			libs = list([lib.replace('\\', '/') for lib in module['PublicAdditionalLibraries']])
+			libs = list([os.path.join(libPath, lib) if '/' not in lib else lib for lib in libs])
+			module['PublicAdditionalLibraries'] = libs
+		
+		# Older versions of the Unreal Engine don't list system libraries separately, so make sure we always have a list even if it's empty
+		if 'PublicSystemLibraries' not in module:
+			module['PublicSystemLibraries'] = []
+		
+		# Convert any relative directory paths into absolute ones (system libraries are names rather than paths)
+		normalised = {'Order': order}
+		for field in MODULE_FIELDS:
+			value = module.get(field, [])
+			value = [value] if isinstance(value, str) else value
+			normalised[field] = self._absolutePaths(value) if field != 'PublicSystemLibraries' else value
+		
+		return normalised
+	
 	def _flatten(self, field, items, transform = None):
 		"""
 		Extracts the entry `field` from each item in the supplied iterable, flattening any nested lists
@@ -138,17 +182,15 @@ class UE4BuildInterrogator(object):
 	
 	def _getThirdPartyLibs(self, platformIdentifier, configuration):
 		"""
-		Runs UnrealBuildTool in JSON export mode and extracts the list of third-party libraries
+		Runs UnrealBuildTool in JSON export mode and extracts the index of third-party library modules
+		"""
+		index, populated = self._getOrPopulateThirdPartyLibs(platformIdentifier, configuration, [])
+		return index
+	
+	def _getOrPopulateThirdPartyLibs(self, platformIdentifier, configuration, ubtArgs):
+		"""
+		Retrieves the cached index of third-party library modules, populating the cache if needed, and returns the index and whether UBT was run
 		"""
-		
-		# If we have previously cached the library list for the current engine version, use the cached data
-		cachedList = CachedDataManager.getCachedDataKey(self.engineVersionHash, 'ThirdPartyLibraries')
-		if cachedList != None:
-			return cachedList
-		
-		# Create a temp directory to hold the JSON file
-		tempDir = tempfile.mkdtemp()
-		jsonFile = os.path.join(tempDir, 'ubt_output.json')
 		
 		# Installed Builds of the Engine only contain a small handful of third-party libraries, rather than the full set
 		# included in a source build of the Engine. However, if the ThirdParty directory from a source build is copied
@@ -156,35 +198,66 @@ class UE4BuildInterrogator(object):
 		# of both worlds and utilise the full set of third-party libraries. Enable this sentinel renaming behaviour only
 		# if you have copied the ThirdParty directory from a source build into your Installed Build, or else the UBT
 		# command will fail trying to rebuild UnrealHeaderTool.
+		renameSentinel = UE4BuildInterrogator._shouldRenameSentinel(self.engineRoot)
+		
+		# If we have previously cached the module index for the current engine version, platform, configuration and sentinel mode, use the cached data
+		cacheQualifiers = UE4BuildInterrogator.cacheQualifiers(self.engineRoot, platformIdentifier, configuration)
+		cachedIndex = CachedDataManager.getCacheEntry(self.engineVersionHash, 'ThirdPartyModuleIndex', cacheQualifiers)
+		if cachedIndex != None:
+			return cachedIndex, False
+		
+		# Renaming the sentinel file modifies shared engine state, so UBT runs that do so must be serialised across threads and processes
+		# (Once we hold the lock, another run may have already populated the cache while we were waiting)
+		if renameSentinel == True:
+			with UE4BuildInterrogator._sentinelLock, FileLock(CachedDataManager.getLockFile(self.engineVersionHash, 'InstalledBuild')):
+				cachedIndex = CachedDataManager.getCacheEntry(self.engineVersionHash, 'ThirdPartyModuleIndex', cacheQualifiers)
+				if cachedIndex != None:
+					return cachedIndex, False
+				return self._exportThirdPartyLibs(platformIdentifier, configuration, cacheQualifiers, ubtArgs, True), True
+		else:
+			return self._exportThirdPartyLibs(platformIdentifier, configuration, cacheQualifiers, ubtArgs, False), True
+	
+	def _exportThirdPartyLibs(self, platformIdentifier, configuration, cacheQualifiers, ubtArgs, renameSentinel):
+		"""
+		Runs UnrealBuildTool in JSON export mode, then normalises, caches and returns the index of third-party library modules
+		"""
 		sentinelFile = os.path.join(self.engineRoot, 'Engine', 'Build', 'InstalledBuild.txt')
 		sentinelBackup = sentinelFile + '.bak'
-		renameSentinel = os.path.exists(sentinelFile) and os.environ.get('UE4CLI_SENTINEL_RENAME', '0') == '1'
+		
+		# Create a temp directory to hold the JSON file
+		# (Each run uses its own directory, so that concurrent runs never share an output file)
+		tempDir = tempfile.mkdtemp()
+		jsonFile = os.path.join(tempDir, 'ubt_output.json')
+		
 		if renameSentinel == True:
 			shutil.move(sentinelFile, sentinelBackup)
 		
 		# Invoke UnrealBuildTool in JSON export mode (make sure we specify gathering mode, since this is a prerequisite of JSON export)
 		# (Ensure we always perform sentinel file cleanup even when errors occur)
+		startTime = time.time()
 		try:
 			args = ['-Mode=JsonExport', '-OutputFile=' +jsonFile ] if (self.engineVersion['MajorVersion'] >= 5 or self.engineVersion['MinorVersion'] >= 22) else ['-gather', '-jsonexport=' + jsonFile, '-SkipBuild']
 			if self.engineVersion['MajorVersion'] >= 5:
-				self.runUBTFunc('UnrealEditor', platformIdentifier, configuration, args)
+				self.runUBTFunc('UnrealEditor', platformIdentifier, configuration, args + ubtArgs)
 			else:
-				self.runUBTFunc('UE4Editor', platformIdentifier, configuration, args)
+				self.runUBTFunc('UE4Editor', platformIdentifier, configuration, args + ubtArgs)
 		finally:
 			if renameSentinel == True:
 				shutil.move(sentinelBackup, sentinelFile)
+		ubtDuration = time.time() - startTime
 		
-		# Parse the JSON output
-		result = json.loads(Utility.readFile(jsonFile))
-		
-		# Extract the list of third-party library modules
+		# Stream the modules from the JSON output, since the export for a source build can be tens of megabytes and
+		# we only need the fields we use from the third-party library modules, which are a small fraction of the total
 		# (Note that since UE4.21, modules no longer have a "Type" field, so we must
 		# rely on the "Directory" field filter below to identify third-party libraries)
-		modules = [result['Modules'][key] for key in result['Modules']]
-		
-		# Filter out any modules from outside the Engine/Source/ThirdParty directory
 		thirdPartyRoot = os.path.join(self.engineRoot, 'Engine', 'Source', 'ThirdParty')
-		thirdparty = list([m for m in modules if thirdPartyRoot in m['Directory']])
+		index = {}
+		for module in JsonExportReader(jsonFile).modules(EXPORT_FIELDS):
+		
+			# Filter out any modules from outside the Engine/Source/ThirdParty directory, then normalise the remaining
+			# modules and index them by name, so lookups don't need to repeat this work
+			if thirdPartyRoot in module['Directory']:
+				index[module['Name']] = self._normaliseModule(module, len(index))
 		
 		# Remove the temp directory
 		try:
@@ -192,7 +265,7 @@ class UE4BuildInterrogator(object):
 		except:
 			pass
 		
-		# Cache the list of libraries for use by subsequent runs
-		CachedDataManager.setCachedDataKey(self.engineVersionHash, 'ThirdPartyLibraries', thirdparty)
+		# Cache the module index for use by subsequent runs
+		CachedDataManager.setCacheEntry(self.engineVersionHash, 'ThirdPartyModuleIndex', cacheQualifiers, index, {'ubtDuration': ubtDuration})
 		
-		return thirdparty
+		return index
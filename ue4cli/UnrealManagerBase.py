@@ -1,17 +1,28 @@
 from .ThirdPartyLibraryDetails import PrintingFormat, ThirdPartyLibraryDetails
 from .UnrealManagerException import UnrealManagerException
 from .ConfigurationManager import ConfigurationManager
-from .UE4BuildInterrogator import UE4BuildInterrogator
 from .CachedDataManager import CachedDataManager
+from .AutomationLogAnalyser import EXIT_REGEX, AutomationLogAnalyser
+from .AutomationSharding import AutomationSharding
+from .AutomationTestCache import AutomationTestCache
+from .BuildManifest import BuildManifest
 from .CMakeCustomFlags import CMakeCustomFlags
-from .Utility import Utility
-import glob, hashlib, json, os, re, shutil, sys
+from .EngineSnapshot import EngineSnapshot
+from .ProjectIndex import ProjectIndex
+from .Utility import DELETION_PREFIX, Utility
+import json, os, re, sys, time
 
 class UnrealManagerBase(object):
 	"""
 	Base class for platform-specific Unreal manager instances
 	"""
 	
+	def __init__(self, engineRoot=None):
+		"""
+		Creates a manager for the specified engine root directory, or for the user-specified or auto-detected engine if None
+		"""
+		self._engineRootSelected = os.path.abspath(engineRoot) if engineRoot is not None else None
+	
 	def clearCachedData(self):
 		"""
 		Clears any cached data we have stored about specific engine versions
@@ -66,6 +77,12 @@ class UnrealManagerBase(object):
 		if hasattr(self, '_engineRootCached'):
 			return self._engineRootCached
 		
+		# An engine selected for this manager instance (e.g. via the `--engine` option) takes precedence over everything else
+		if self._engineRootSelected is not None:
+			self._engineRootCached = self._engineRootSelected
+			Utility.printStderr('Using selected engine root: ' + self._engineRootSelected)
+			return self._engineRootSelected
+		
 		override = self.getEngineRootOverride()
 		if override:
 			self._engineRootCached = override
@@ -79,6 +96,29 @@ class UnrealManagerBase(object):
 		
 		raise UnrealManagerException('could not detect Unreal Engine root directory! Please, provide it manually via: ue4 setroot <ROOTDIR>')
 	
+	def getEngineSnapshot(self):
+		"""
+		Returns the immutable metadata snapshot for the Unreal Engine, re-parsing `Build.version` only when it has been modified
+		"""
+		cached = getattr(self, '_engineSnapshotCached', None)
+		if cached is not None and cached.isCurrent() == True:
+			return cached
+		
+		# Parse the version details first, since resolving the editor binary path under some platforms requires the version number
+		# (The partial snapshot is visible to any methods we call below, which only access the version-related fields)
+		snapshot = EngineSnapshot.fromEngineRoot(self.getEngineRoot())
+		self._engineSnapshotCached = snapshot
+		
+		# Resolve the locations of the scripts and binaries we invoke, and replace the partial snapshot with the complete one
+		snapshot = snapshot._replace(
+			buildScript = self.getBuildScript(),
+			runUATScript = self.getRunUATScript(),
+			editorBinary = self._resolveEditorBinary(snapshot, False),
+			editorBinaryCmd = self._resolveEditorBinary(snapshot, True)
+		)
+		self._engineSnapshotCached = snapshot
+		return snapshot
+	
 	def getEngineVersion(self, outputFormat = 'full'):
 		"""
 		Returns the version number of the latest installed version of UE4
@@ -102,29 +142,20 @@ class UnrealManagerBase(object):
 		"""
 		Returns the compatible Perforce changelist identifier for the latest installed version of UE4
 		"""
-		
-		# Newer versions of the engine use the key "CompatibleChangelist", older ones use "Changelist"
-		version = self._getEngineVersionDetails()
-		if 'CompatibleChangelist' in version:
-			return int(version['CompatibleChangelist'])
-		else:
-			return int(version['Changelist'])
+		return self.getEngineSnapshot().changelist
 	
 	def isInstalledBuild(self):
 		"""
 		Determines if the Engine is an Installed Build
 		"""
-		sentinelFile = os.path.join(self.getEngineRoot(), 'Engine', 'Build', 'InstalledBuild.txt')
-		return os.path.exists(sentinelFile)
+		return self.getEngineSnapshot().installedBuild
 	
 	def getEditorBinary(self, cmdVersion=False):
 		"""
 		Determines the location of the UE4Editor/UnrealEditor binary
 		"""
-		if self._getEngineVersionDetails()['MajorVersion'] >= 5:
-			return os.path.join(self.getEngineRoot(), 'Engine', 'Binaries', self.getPlatformIdentifier(), 'UnrealEditor' + self._editorPathSuffix(cmdVersion))
-		else:
-			return os.path.join(self.getEngineRoot(), 'Engine', 'Binaries', self.getPlatformIdentifier(), 'UE4Editor' + self._editorPathSuffix(cmdVersion))	
+		snapshot = self.getEngineSnapshot()
+		return snapshot.editorBinaryCmd if cmdVersion == True else snapshot.editorBinary
 
 	def getBuildScript(self):
 		"""
@@ -148,8 +179,8 @@ class UnrealManagerBase(object):
 		"""
 		Detects the .uproject descriptor file for the Unreal project in the specified directory
 		"""
-		for project in glob.glob(os.path.join(dir, '*.uproject')):
-			return os.path.realpath(project)
+		for project in ProjectIndex.forDirectory(dir)['projectDescriptors']:
+			return project
 		
 		# No project detected
 		raise UnrealManagerException('could not detect an Unreal project in the current directory')
@@ -158,8 +189,8 @@ class UnrealManagerBase(object):
 		"""
 		Detects the .uplugin descriptor file for the Unreal plugin in the specified directory
 		"""
-		for plugin in glob.glob(os.path.join(dir, '*.uplugin')):
-			return os.path.realpath(plugin)
+		for plugin in ProjectIndex.forDirectory(dir)['pluginDescriptors']:
+			return plugin
 		
 		# No plugin detected
 		raise UnrealManagerException('could not detect an Unreal plugin in the current directory')
@@ -168,13 +199,12 @@ class UnrealManagerBase(object):
 		"""
 		Detects the descriptor file for either an Unreal project or an Unreal plugin in the specified directory
 		"""
-		try:
-			return self.getProjectDescriptor(dir)
-		except:
-			try:
-				return self.getPluginDescriptor(dir)
-			except:
-				raise UnrealManagerException('could not detect an Unreal project or plugin in the directory "{}"'.format(dir))
+		index = ProjectIndex.forDirectory(dir)
+		for descriptor in index['projectDescriptors'] + index['pluginDescriptors']:
+			return descriptor
+		
+		# No project or plugin detected
+		raise UnrealManagerException('could not detect an Unreal project or plugin in the directory "{}"'.format(dir))
 	
 	def isProject(self, descriptor):
 		"""
@@ -201,6 +231,48 @@ class UnrealManagerBase(object):
 		interrogator = self._getUE4BuildInterrogator()
 		return interrogator.list(self.getPlatformIdentifier(), configuration, self._getLibraryOverrides())
 	
+	def warmLibraryCache(self, configurations = ['Development'], platforms = None, jobs = None):
+		"""
+		Populates the cached third-party library details for each combination of the specified build configurations and platforms
+		"""
+		from concurrent.futures import ThreadPoolExecutor
+		
+		# Verify that the specified build configurations are valid
+		for configuration in configurations:
+			if configuration not in self.validBuildConfigurations():
+				raise UnrealManagerException('invalid build configuration "' + configuration + '"')
+		
+		# Create the interrogator up front, so the engine details are resolved before any worker threads start
+		platforms = platforms if platforms is not None else [self.getPlatformIdentifier()]
+		combinations = [(platform, configuration) for platform in platforms for configuration in configurations]
+		interrogator = self._getUE4BuildInterrogator()
+		results = {}
+		
+		def populate(combination, ubtArgs):
+			try:
+				startTime = time.time()
+				populated = interrogator.populateCache(combination[0], combination[1], ubtArgs)
+				results[combination] = 'populated in {:.1f}s'.format(time.time() - startTime) if populated == True else 'already cached'
+			except Exception as e:
+				results[combination] = 'failed: {}'.format(e)
+			print('{} {}: {}'.format(combination[0], combination[1], results[combination]), flush=True)
+		
+		# UBT only supports concurrent runs from Unreal Engine 4.22 onwards, where each run must disable its single-instance mutex
+		# (The first run happens on its own so that it compiles the build rules assemblies which all of the subsequent runs share)
+		if len(combinations) > 0:
+			populate(combinations[0], [])
+		if self._getEngineVersionTuple() >= (4, 22, 0):
+			with ThreadPoolExecutor(max_workers=max(1, jobs if jobs is not None else (os.cpu_count() or 1))) as executor:
+				list(executor.map(lambda combination: populate(combination, ['-NoMutex']), combinations[1:]))
+		else:
+			for combination in combinations[1:]:
+				populate(combination, [])
+		
+		# Report any failures once all of the runs have completed
+		failed = ['{} {}'.format(platform, configuration) for platform, configuration in combinations if results[(platform, configuration)].startswith('failed')]
+		if len(failed) > 0:
+			raise UnrealManagerException('failed to populate the library cache for: ' + ', '.join(failed))
+	
 	def getThirdpartyLibs(self, libs, configuration = 'Development', includePlatformDefaults = True):
 		"""
 		Retrieves the ThirdPartyLibraryDetails instance for Unreal-bundled versions of the specified third-party libraries
@@ -226,8 +298,8 @@ class UnrealManagerBase(object):
 				platformDefaults = False
 				libs = libs[1:]
 
-		details = self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults)
-		return details.getCompilerFlags(self.getEngineRoot(), fmt)
+		render = lambda: self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults).getCompilerFlags(self.getEngineRoot(), fmt)
+		return self._getMemoisedLibraryOutput('cxxflags', libs, [fmt.delim, platformDefaults], render)
 	
 	def getThirdPartyLibLinkerFlags(self, libs):
 		"""
@@ -250,8 +322,8 @@ class UnrealManagerBase(object):
 				platformDefaults = False
 				libs = libs[1:]
 
-		details = self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults)
-		return details.getLinkerFlags(self.getEngineRoot(), fmt, includeLibs)
+		render = lambda: self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults).getLinkerFlags(self.getEngineRoot(), fmt, includeLibs)
+		return self._getMemoisedLibraryOutput('ldflags', libs, [fmt.delim, includeLibs, platformDefaults], render)
 	
 	def getThirdPartyLibCmakeFlags(self, libs):
 		"""
@@ -269,9 +341,12 @@ class UnrealManagerBase(object):
 				platformDefaults = False
 				libs = libs[1:]
 
-		details = self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults)
-		CMakeCustomFlags.processLibraryDetails(details)
-		return details.getCMakeFlags(self.getEngineRoot(), fmt)
+		def render():
+			details = self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults)
+			CMakeCustomFlags.processLibraryDetails(details)
+			return details.getCMakeFlags(self.getEngineRoot(), fmt)
+		
+		return self._getMemoisedLibraryOutput('cmakeflags', libs, [fmt.delim, platformDefaults], render)
 	
 	def getThirdPartyLibIncludeDirs(self, libs):
 		"""
@@ -282,8 +357,8 @@ class UnrealManagerBase(object):
 			platformDefaults = False
 			libs = libs[1:]
 
-		details = self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults)
-		return details.getIncludeDirectories(self.getEngineRoot(), delimiter='\n')
+		render = lambda: self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults).getIncludeDirectories(self.getEngineRoot(), delimiter='\n')
+		return self._getMemoisedLibraryOutput('includedirs', libs, [platformDefaults], render)
 	
 	def getThirdPartyLibFiles(self, libs):
 		"""
@@ -294,8 +369,8 @@ class UnrealManagerBase(object):
 			platformDefaults = False
 			libs = libs[1:]
 
-		details = self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults)
-		return details.getLibraryFiles(self.getEngineRoot(), delimiter='\n')
+		render = lambda: self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults).getLibraryFiles(self.getEngineRoot(), delimiter='\n')
+		return self._getMemoisedLibraryOutput('libfiles', libs, [platformDefaults], render)
 	
 	def getThirdPartyLibDefinitions(self, libs):
 		"""
@@ -306,8 +381,8 @@ class UnrealManagerBase(object):
 			platformDefaults = False
 			libs = libs[1:]
 		
-		details = self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults)
-		return details.getPreprocessorDefinitions(self.getEngineRoot(), delimiter='\n')
+		render = lambda: self.getThirdpartyLibs(libs, includePlatformDefaults=platformDefaults).getPreprocessorDefinitions(self.getEngineRoot(), delimiter='\n')
+		return self._getMemoisedLibraryOutput('defines', libs, [platformDefaults], render)
 	
 	def generateProjectFiles(self, dir=os.getcwd(), args=[]):
 		"""
@@ -315,7 +390,7 @@ class UnrealManagerBase(object):
 		"""
 		
 		# If the project is a pure Blueprint project, then we cannot generate project files
-		if os.path.exists(os.path.join(dir, 'Source')) == False:
+		if ProjectIndex.forDirectory(dir)['hasSource'] == False:
 			Utility.printStderr('Pure Blueprint project, nothing to generate project files for.')
 			return
 		
@@ -324,9 +399,10 @@ class UnrealManagerBase(object):
 		projectFile = self.getProjectDescriptor(dir)
 		Utility.run([genScript, '-project=' + projectFile, '-game', '-engine'] + args, cwd=os.path.dirname(genScript), raiseOnError=True)
 	
-	def cleanDescriptor(self, dir=os.getcwd()):
+	def cleanDescriptor(self, dir=os.getcwd(), dryRun=False, background=False):
 		"""
-		Cleans the build artifacts for the Unreal project or plugin in the specified directory
+		Cleans the build artifacts for the Unreal project or plugin in the specified directory. If `dryRun` is True then the
+		artifacts are reported rather than deleted, and if `background` is True then they are deleted in the background.
 		"""
 		
 		# Verify that an Unreal project or plugin exists in the specified directory
@@ -334,18 +410,42 @@ class UnrealManagerBase(object):
 		
 		# Because performing a clean will also delete the engine build itself when using
 		# a source build, we simply delete the `Binaries` and `Intermediate` directories
-		shutil.rmtree(os.path.join(dir, 'Binaries'), ignore_errors=True)
-		shutil.rmtree(os.path.join(dir, 'Intermediate'), ignore_errors=True)
+		# (If we are cleaning a project, we also clean any plugins, including those nested inside other plugins)
+		roots = [dir] + ([plugin['root'] for plugin in ProjectIndex.forDirectory(dir)['plugins']] if self.isProject(descriptor) else [])
+		directories = [os.path.join(root, subdir) for root in roots for subdir in ['Binaries', 'Intermediate']]
+		directories = [directory for directory in directories if os.path.isdir(directory)]
 		
-		# If we are cleaning a project, also clean any plugins
-		if self.isProject(descriptor):
-			projectPlugins = glob.glob(os.path.join(dir, 'Plugins', '**', '*.uplugin'), recursive=True)
-			for plugin in projectPlugins:
-				self.cleanDescriptor(os.path.dirname(plugin))
+		# Find any directories that a previous background clean renamed aside but has not finished deleting
+		leftovers = [
+			os.path.join(root, entry) for root in roots for entry in os.listdir(root)
+			if entry.startswith(DELETION_PREFIX) and os.path.isdir(os.path.join(root, entry))
+		]
+		
+		# If we are performing a dry run then report the space that would be reclaimed
+		if dryRun == True:
+			from .FilesystemScanner import FilesystemScanner
+			from concurrent.futures import ThreadPoolExecutor
+			totalFiles, totalBytes = 0, 0
+			with ThreadPoolExecutor(max_workers=max(1, min(len(directories + leftovers), 16))) as executor:
+				for directory, files in zip(directories + leftovers, executor.map(FilesystemScanner.statTree, directories + leftovers)):
+					size = sum([file[1] for file in files])
+					totalFiles, totalBytes = totalFiles + len(files), totalBytes + size
+					print('{:>10.1f} MiB {:>8} files  {}'.format(size / (1024 * 1024), len(files), os.path.relpath(directory, dir)))
+			
+			print('Would reclaim {:.1f} MiB in {} files from {} directories'.format(totalBytes / (1024 * 1024), totalFiles, len(directories + leftovers)))
+			return
+		
+		# Leftover directories have already been renamed aside, so they are deleted in place rather than being renamed again
+		# (When deleting in the background we leave them alone, since the background process that renamed them may still be deleting them)
+		Utility.removeDirectories(directories, background)
+		if background == False:
+			Utility.removeDirectories(leftovers)
 	
-	def buildDescriptor(self, dir=os.getcwd(), configuration='Development', target='Editor', args=[], suppressOutput=False):
+	def buildDescriptor(self, dir=os.getcwd(), configuration='Development', target='Editor', args=[], suppressOutput=False, logFile=None):
 		"""
 		Builds the editor modules for the Unreal project or plugin in the specified directory, using the specified build configuration
+		(Multiple comma-separated build configurations and targets can be specified, and all of the combinations are built together)
+		If `logFile` is specified then the output of UBT is appended to it rather than being printed or captured.
 		"""
 		
 		# Verify that an Unreal project or plugin exists in the specified directory
@@ -353,39 +453,188 @@ class UnrealManagerBase(object):
 		descriptorType = 'project' if self.isProject(descriptor) else 'plugin'
 		
 		# If the project or plugin is Blueprint-only, there is no C++ code to build
-		if os.path.exists(os.path.join(dir, 'Source')) == False:
+		if ProjectIndex.forDirectory(dir)['hasSource'] == False:
 			Utility.printStderr('Pure Blueprint {}, nothing to build.'.format(descriptorType))
 			return
 		
-		# Verify that the specified build configuration is valid
-		if configuration not in self.validBuildConfigurations():
-			raise UnrealManagerException('invalid build configuration "' + configuration + '"')
+		# Verify that the specified build configurations are valid
+		configurations = configuration.split(',')
+		for configuration in configurations:
+			if configuration not in self.validBuildConfigurations():
+				raise UnrealManagerException('invalid build configuration "' + configuration + '"')
 		
 		# Check if the user specified the `-notools` flag to opt out of building Engine tools when working with source builds
 		unstripped = list(args)
 		args = Utility.stripArgs(args, ['-notools'])
 		noTools = len(unstripped) > len(args)
 		
+		# Check if the user specified the `-force` flag to bypass the detection of unchanged builds
+		unstripped = list(args)
+		args = Utility.stripArgs(args, ['-force'])
+		force = len(unstripped) > len(args)
+		
+		# If the detection of unchanged builds is enabled then skip any builds where nothing has changed since the last successful build
+		# (The inputs are fingerprinted prior to building, so any changes made while the build is running will be detected by the next build)
+		builds = []
+		inputs = None
+		if force == False and BuildManifest.enabled() == True:
+			inputs = BuildManifest.inputsFingerprint(dir, descriptor, args + (['-notools'] if noTools == True else []), self._getEngineVersionHash())
+		for target in target.split(','):
+			editorFiles = [self.getEditorBinary(True)] if target == 'Editor' else []
+			for configuration in configurations:
+				buildKey = '{}|{}|{}'.format(self.getPlatformIdentifier(), configuration, target)
+				if inputs is not None and BuildManifest.isUnchanged(dir, buildKey, inputs, BuildManifest.outputsFingerprint(dir, editorFiles)):
+					Utility.printStderr('No changes detected since the last successful {} {} build of the {}, skipping build.'.format(configuration, target, descriptorType))
+				else:
+					builds.append({'target': target, 'configuration': configuration, 'key': buildKey, 'editorFiles': editorFiles})
+		if len(builds) == 0:
+			return
+		
 		# If we're using a source build of the Engine then make sure ShaderCompileWorker is built before building project Editor modules
-		if noTools == False and self.isInstalledBuild() == False and self.isProject(descriptor) and target == 'Editor':
+		if noTools == False and self.isInstalledBuild() == False and self.isProject(descriptor) and 'Editor' in [build['target'] for build in builds]:
 			Utility.printStderr('Ensuring ShaderCompileWorker is built before building project Editor modules...')
-			self.buildTarget('ShaderCompileWorker', 'Development', [], suppressOutput)
+			self.buildTool('ShaderCompileWorker', 'Development', suppressOutput, force, logFile)
 		
 		# Generate the arguments to pass to UBT
-		if self._getEngineVersionDetails()['MajorVersion'] >= 5:
-			target = self.getDescriptorName(descriptor) + target if self.isProject(descriptor) else 'UnrealEditor'
-		else:
-			target = self.getDescriptorName(descriptor) + target if self.isProject(descriptor) else 'UE4Editor'
+		for build in builds:
+			if self._getEngineVersionDetails()['MajorVersion'] >= 5:
+				build['ubtTarget'] = self.getDescriptorName(descriptor) + build['target'] if self.isProject(descriptor) else 'UnrealEditor'
+			else:
+				build['ubtTarget'] = self.getDescriptorName(descriptor) + build['target'] if self.isProject(descriptor) else 'UE4Editor'
 		baseArgs = ['-{}='.format(descriptorType) + descriptor]
 		
-		# Perform the build
-		self._runUnrealBuildTool(target, self.getPlatformIdentifier(), configuration, baseArgs + args, suppressOutput)
+		# Perform the builds
+		results = self._runUnrealBuildToolBatch(
+			[(build['ubtTarget'], build['configuration'], baseArgs) for build in builds],
+			args,
+			suppressOutput,
+			logFile
+		)
+		
+		# Record the build inputs and outputs for each successful build so the next build can be skipped if nothing changes
+		if inputs is not None:
+			for build, succeeded in zip(builds, results):
+				if succeeded == True:
+					BuildManifest.record(dir, build['key'], inputs, BuildManifest.outputsFingerprint(dir, build['editorFiles']))
+		
+		self._raiseForFailedBuilds(builds, results)
 	
-	def buildTarget(self, target, configuration='Development', args=[], suppressOutput=False):
+	def buildTarget(self, target, configuration='Development', args=[], suppressOutput=False, logFile=None):
 		"""
 		Builds the specified target using UBT. Primarily useful for building Engine tools and programs.
+		(Multiple comma-separated targets and build configurations can be specified, and all of the combinations are built together)
 		"""
-		self._runUnrealBuildTool(target, self.getPlatformIdentifier(), configuration, args, capture=suppressOutput)
+		builds = [{'ubtTarget': t, 'configuration': c} for t in target.split(',') for c in configuration.split(',')]
+		if len(builds) == 1:
+			return self._runUnrealBuildTool(target, self.getPlatformIdentifier(), configuration, args, capture=suppressOutput, logFile=logFile)
+		
+		results = self._runUnrealBuildToolBatch([(build['ubtTarget'], build['configuration'], []) for build in builds], args, suppressOutput, logFile)
+		self._raiseForFailedBuilds(builds, results)
+	
+	def buildTool(self, target, configuration='Development', suppressOutput=False, force=False, logFile=None):
+		"""
+		Builds the specified Engine tool (e.g. ShaderCompileWorker) using UBT, unless the tool's binary is unchanged since the last time we built it.
+		Returns True if UBT was run, or False if the tool was already up-to-date.
+		"""
+		from .FileLock import FileLock
+		snapshot = self.getEngineSnapshot()
+		binary = self._getToolBinary(target, configuration)
+		stampKey = 'ToolStamp|' + '|'.join([snapshot.root, self.getPlatformIdentifier(), configuration, target])
+		if force == False and self._toolStampIsValid(snapshot, stampKey, binary) == True:
+			return False
+		
+		# Serialise builds of the tool across concurrent jobs using the same engine, checking the stamp again once we
+		# hold the lock, since another job may have built the tool while we were waiting
+		with FileLock(CachedDataManager.getLockFile(snapshot.versionHash, 'Tool-' + target)):
+			if force == False and self._toolStampIsValid(snapshot, stampKey, binary) == True:
+				return False
+			
+			self.buildTarget(target, configuration, [], suppressOutput, logFile)
+			
+			# Record the stamp for the newly-built tool, which remains valid until the binary or the engine snapshot changes
+			try:
+				details = os.stat(binary)
+				CachedDataManager.setCachedDataKey(snapshot.versionHash, stampKey, {
+					'versionMtime': snapshot.versionMtime,
+					'size': details.st_size,
+					'mtime': details.st_mtime_ns
+				})
+			except OSError:
+				pass
+		
+		return True
+	
+	def buildDescriptors(self, dirs, configuration='Development', target='Editor', args=[], jobs=None):
+		"""
+		Builds the Unreal projects and plugins in each of the specified directories, running multiple builds concurrently such that
+		the total number of parallel compile actions fits within the host's CPU cores and memory
+		"""
+		from concurrent.futures import ThreadPoolExecutor
+		from .HostResources import HostResources
+		
+		# Verify that each directory contains a project or plugin before we start building anything, and resolve the engine details
+		# up front so they are not resolved concurrently by the worker threads
+		dirs = [os.path.abspath(dir) for dir in dirs]
+		descriptors = [self.getDescriptor(dir) for dir in dirs]
+		self.getEngineSnapshot()
+		
+		# UBT only supports concurrent runs from Unreal Engine 4.22 onwards, where each run must disable its single-instance mutex
+		maxJobs = jobs if self._getEngineVersionTuple() >= (4, 22, 0) else 1
+		concurrentJobs, actionsPerJob = HostResources.planJobs(len(dirs), maxJobs)
+		jobArgs = list(args)
+		if concurrentJobs > 1:
+			jobArgs.append('-NoMutex')
+		if len(Utility.findArgs(args, ['-MaxParallelActions='])) == 0:
+			jobArgs.append('-MaxParallelActions={}'.format(actionsPerJob))
+		
+		# If we're using a source build of the Engine then build ShaderCompileWorker once for all of the projects, rather than in each job
+		projects = [descriptor for dir, descriptor in zip(dirs, descriptors) if self.isProject(descriptor) and ProjectIndex.forDirectory(dir)['hasSource'] == True]
+		if len(Utility.findArgs(args, ['-notools'])) == 0 and self.isInstalledBuild() == False and len(projects) > 0 and 'Editor' in target.split(','):
+			Utility.printStderr('Ensuring ShaderCompileWorker is built before building project Editor modules...')
+			self.buildTool('ShaderCompileWorker', 'Development', False, len(Utility.findArgs(args, ['-force'])) > 0)
+			jobArgs.append('-notools')
+		
+		# Perform the builds, reporting the outcome of each as it completes
+		Utility.printStderr('Building {} descriptors using {} concurrent jobs with up to {} parallel actions each...'.format(len(dirs), concurrentJobs, actionsPerJob))
+		# (The UBT output for each descriptor is written to its own log file, so the trailing output of each failed build can be reported,
+		# including when multiple targets or configurations were built together and the exception only names the failed builds)
+		results = {}
+		def build(dir):
+			startTime = time.time()
+			logFile = os.path.join(dir, 'Intermediate', 'ue4cli', 'BuildAll.log')
+			try:
+				if ProjectIndex.forDirectory(dir)['hasSource'] == False:
+					results[dir] = {'outcome': 'skipped (Blueprint only)', 'output': None}
+				else:
+					os.makedirs(os.path.dirname(logFile), exist_ok=True)
+					open(logFile, 'wb').close()
+					self.buildDescriptor(dir, configuration, target, jobArgs, suppressOutput=True, logFile=logFile)
+					results[dir] = {'outcome': 'succeeded', 'output': None}
+			except Exception as e:
+				try:
+					with open(logFile, 'rb') as log:
+						output = log.read().decode('utf-8', errors='replace').rstrip()
+				except OSError:
+					output = ''
+				results[dir] = {'outcome': 'failed', 'output': '\n'.join((output if output != '' else str(e)).splitlines()[-20:]), 'logFile': logFile}
+			results[dir]['duration'] = time.time() - startTime
+			Utility.printStderr('[{}/{}] {}: {} in {:.1f}s'.format(len(results), len(dirs), dir, results[dir]['outcome'], results[dir]['duration']))
+		
+		with ThreadPoolExecutor(max_workers=concurrentJobs) as executor:
+			list(executor.map(build, dirs))
+		
+		# Print the trailing output for each failed build, followed by the summary table
+		failed = [dir for dir in dirs if results[dir]['outcome'] == 'failed']
+		for dir in failed:
+			Utility.printStderr('\nTrailing output for {} (log: {}):\n{}'.format(dir, results[dir]['logFile'], results[dir]['output']))
+		
+		nameWidth = max([len(self.getDescriptorName(descriptor)) for descriptor in descriptors] + [len('Descriptor')])
+		print('\n{:<{width}}  {:<24}  {:>9}  {}'.format('Descriptor', 'Outcome', 'Duration', 'Directory', width=nameWidth))
+		for dir, descriptor in zip(dirs, descriptors):
+			print('{:<{width}}  {:<24}  {:>8.1f}s  {}'.format(self.getDescriptorName(descriptor), results[dir]['outcome'], results[dir]['duration'], dir, width=nameWidth))
+		
+		if len(failed) > 0:
+			raise UnrealManagerException('{} of {} builds failed'.format(len(failed), len(dirs)))
 	
 	def runEditor(self, dir=os.getcwd(), debug=False, args=[]):
 		"""
@@ -395,76 +644,56 @@ class UnrealManagerBase(object):
 		extraFlags = ['-debug'] + args if debug == True else args
 		Utility.run([self.getEditorBinary(True), projectFile] + extraFlags + ['-stdout', '-FullStdOutLogOutput'], raiseOnError=True)
 	
-	def runUAT(self, args):
+	def runUAT(self, args, logFile=None, env=None):
 		"""
-		Runs the Unreal Automation Tool with the supplied arguments
+		Runs the Unreal Automation Tool with the supplied arguments, writing its output to the specified log file if one is specified
 		"""
-		Utility.run([self.getRunUATScript()] + args, cwd=self.getEngineRoot(), raiseOnError=True)
+		
+		# If parallelism limits are enabled then pass them through to any UBT invocations that UAT performs
+		ubtArgs = Utility.findArgs(args, ['-ubtargs='])
+		parallelismArgs = self._parallelismArgs([arg for ubtArg in ubtArgs for arg in Utility.getArgValue(ubtArg).strip('"').split()])
+		if len(parallelismArgs) > 0:
+			if len(ubtArgs) > 0:
+				args = [(arg.split('=', 1)[0] + '=' + Utility.getArgValue(arg).strip('"') + ' ' + parallelismArgs[0]) if arg in ubtArgs else arg for arg in args]
+			else:
+				args = args + ['-ubtargs=' + parallelismArgs[0]]
+		
+		Utility.run([self.getEngineSnapshot().runUATScript] + args, cwd=self.getEngineRoot(), raiseOnError=True, logFile=logFile, env=env)
 	
 	def packageProject(self, dir=os.getcwd(), configuration='Shipping', extraArgs=[]):
 		"""
 		Packages a build of the Unreal project in the specified directory, using common packaging options
+		(If the `--platforms` option is specified then a build is packaged for each of the listed platforms concurrently)
 		"""
 		
 		# Verify that the specified build configuration is valid
 		if configuration not in self.validBuildConfigurations():
 			raise UnrealManagerException('invalid build configuration "' + configuration + '"')
 		
-		# Strip out the `-NoCompileEditor` flag if the user has specified it, since the Development version
-		# of the Editor modules for the project are needed in order to run the commandlet that cooks content
-		extraArgs = Utility.stripArgs(extraArgs, ['-nocompileeditor'])
+		# Parse the list of platforms and the optional limit on the number of concurrent runs, so these options never reach UAT
+		options = {}
+		for option in ['--platforms', '--jobs']:
+			if option in extraArgs:
+				optionIndex = extraArgs.index(option)
+				if optionIndex + 1 >= len(extraArgs):
+					raise UnrealManagerException('the {} option requires a value'.format(option))
+				options[option] = extraArgs[optionIndex + 1]
+				extraArgs = extraArgs[:optionIndex] + extraArgs[optionIndex+2:]
+		if '--jobs' in options and '--platforms' not in options:
+			raise UnrealManagerException('the --jobs option requires --platforms')
 		
-		# Prevent the user from specifying multiple `-platform=` or `-targetplatform=` arguments,
-		# and use the current host platform if no platform argument was explicitly specified
-		platformArgs = Utility.findArgs(extraArgs, ['-platform=', '-targetplatform='])
-		platform = Utility.getArgValue(platformArgs[0]) if len(platformArgs) > 0 else self.getPlatformIdentifier()
-		extraArgs = Utility.stripArgs(extraArgs, platformArgs) + ['-platform={}'.format(platform)]
-		
-		# If we are building a dedicated server then ensure the server platform is set correctly
-		serverArg = Utility.findArgs(extraArgs, ['-server'])
-		serverPlatformArg = Utility.findArgs(extraArgs, ['-serverplatform=', '-servertargetplatform='])
-		if len(serverArg) > 0 and len(serverPlatformArg) == 0:
-			extraArgs.append('-serverplatform={}'.format(platform))
-		
-		# If we are packaging a Shipping build, do not include debug symbols unless explicitly requested
-		preserveDebugArg = Utility.findArgs(extraArgs, ['-debuginfo'])
-		extraArgs = Utility.stripArgs(extraArgs, ['-debuginfo'])
-		if configuration == 'Shipping' and len(preserveDebugArg) == 0:
-			extraArgs.append('-nodebuginfo')
-		
-		# Define the usage of pak files, default value is pak files for all platforms except HTML5
-		pakArg = Utility.findArgs(extraArgs, ['-pak', '-package'])
-		if len(pakArg) == 0:
-			pakArg = '-package' if platform.upper() == 'HTML5' else '-pak'
+		# Determine if we are packaging for multiple platforms
+		if '--platforms' in options:
+			platforms = [platform for platform in options['--platforms'].split(',') if platform != '']
+			if len(platforms) == 0:
+				raise UnrealManagerException('the --platforms option requires at least one platform')
+			try:
+				jobs = int(options['--jobs']) if '--jobs' in options else None
+			except ValueError:
+				raise UnrealManagerException('the --jobs option requires an integer value')
+			self._packageProjectForPlatforms(dir, configuration, extraArgs, platforms, jobs)
 		else:
-			pakArg = ''
-		
-		# Include the `-allmaps` flag if we are building a client target and haven't specified a list of maps
-		buildingClient = (len(Utility.findArgs(extraArgs, ['-noclient'])) == 0)
-		specifiedMaps = (len(Utility.findArgs(extraArgs, ['-MapsToCook', '-MapIniSectionsToCook'])) > 0)
-		if buildingClient == True and specifiedMaps == False:
-			extraArgs.append('-allmaps')
-		
-		# Automatically set the archive directory if the user has not explicitly specified one
-		if (len(Utility.findArgs(extraArgs, ['-archivedirectory='])) == 0):
-			extraArgs.extend(['-archivedirectory=' + os.path.join(os.path.abspath(dir), 'dist')])
-		
-		# Invoke UAT to package the build
-		self.runUAT([
-			'BuildCookRun'
-			] + extraArgs + [
-			'-utf8output',
-			'-clientconfig=' + configuration,
-			'-serverconfig=' + configuration,
-			'-project=' + self.getProjectDescriptor(dir),
-			'-noP4',
-			'-cook',
-			'-build',
-			'-stage',
-			'-prereqs',
-			pakArg,
-			'-archive'
-		])
+			self._packageProject(dir, configuration, extraArgs)
 	
 	def packagePlugin(self, dir=os.getcwd(), extraArgs=[]):
 		"""
@@ -498,52 +727,56 @@ class UnrealManagerBase(object):
 		'''
 		Invokes the Automation Test commandlet for the specified project with the supplied automation test commands
 		'''
-		
-		# IMPORTANT IMPLEMENTATION NOTE:
-		# We need to format the command as a string and execute it using a shell in order to
-		# ensure the "-ExecCmds" argument will be parsed correctly under Windows. This is because
-		# the WinMain() function uses GetCommandLineW() to retrieve the raw command-line string,
-		# rather than using an argv-style structure. The string is then passed to FParse::Value(),
-		# which checks for the presence of a quote character after the equals sign to determine if
-		# whitespace should be stripped or preserved. Without the quote character, the spaces in the
-		# argument payload will be stripped out, corrupting our list of automation commands and
-		# preventing them from executing correctly.
-		
-		command = '{} {}'.format(Utility.escapePathForShell(self.getEditorBinary(True)), Utility.escapePathForShell(projectFile))
-		command += ' -game -buildmachine -stdout -fullstdoutlogoutput -forcelogflush -unattended -nopause -nosplash'
-		if enableRHI == False:
-			command += ' -nullrhi'
-		command += ' -ExecCmds="automation {};quit" '.format(';'.join(commands))
-		command += ' '.join([Utility.escapePathForShell(a) for a in extraArgs])
-		
+		command = self._automationCommand(projectFile, commands, extraArgs, enableRHI)
 		if capture == True:
 			return Utility.capture(command, shell=True)
 		else:
 			Utility.run(command, shell=True)
 	
-	def listAutomationTests(self, projectFile):
+	def streamAutomationCommands(self, projectFile, commands, extraArgs, enableRHI=False, echo=False, lineCallback=None):
+		'''
+		Invokes the Automation Test commandlet like runAutomationCommands(), but processes the log output as it is produced rather than buffering it
+		(See Utility.captureStreaming() for details of the `echo` and `lineCallback` parameters)
+		'''
+		command = self._automationCommand(projectFile, commands, extraArgs, enableRHI)
+		return Utility.captureStreaming(command, shell=True, echo=echo, lineCallback=lineCallback)
+	
+	def listAutomationTests(self, projectFile, refresh=False):
 		'''
 		Returns the list of supported automation tests for the specified project
 		'''
 		
-		# Attempt to retrieve the list of automation tests
+		# Use the cached list of tests if the project descriptor, the project and plugin binaries, and the engine have not changed
+		fingerprint = AutomationTestCache.fingerprint(projectFile, self._getEngineVersionHash(), self.getEditorBinary(True))
+		if refresh == False:
+			cached = AutomationTestCache.getTests(projectFile, fingerprint)
+			if cached is not None:
+				return cached
+		
+		# Attempt to retrieve the list of automation tests, extracting the test names as the log output is produced
+		# (As with the test names, we only check stdout for the log output that indicates the Editor exited normally)
 		tests = set()
+		exited = []
 		testRegex = re.compile('.*LogAutomationCommandLine: Display: \t(.+)')
-		logOutput = self.runAutomationCommands(projectFile, ['List'], [], capture=True)
-		for line in logOutput.stdout.split('\n'):
-			matches = testRegex.search(line)
-			if matches != None:
-				tests.add(matches[1].strip())
+		def collectTest(stream, line):
+			if stream == 'stdout':
+				matches = testRegex.search(line)
+				if matches != None:
+					tests.add(matches[1].strip())
+				if EXIT_REGEX.search(line) is not None:
+					exited.append(True)
+		logOutput = self.streamAutomationCommands(projectFile, ['List'], [], lineCallback=collectTest)
 		
 		# Detect if the Editor terminated abnormally (i.e. not triggered by `automation quit`)
-		# In Unreal Engine 4.27.0, the exit method changed from RequestExit to RequestExitWithStatus
-		if 'PlatformMisc::RequestExit(' not in logOutput.stdout and 'PlatformMisc::RequestExitWithStatus(' not in logOutput.stdout:
+		if len(exited) == 0:
 			raise RuntimeError(
 				'failed to retrieve the list of automation tests!' +
-				' stdout was: "{}", stderr was: "{}"'.format(logOutput.stdout, logOutput.stderr)
+				' The trailing output was: "{}"'.format(logOutput.tail())
 			)
 		
-		return sorted(list(tests))
+		tests = sorted(list(tests))
+		AutomationTestCache.setTests(projectFile, fingerprint, tests)
+		return tests
 	
 	def automationTests(self, dir=os.getcwd(), args=[]):
 		'''
@@ -565,6 +798,34 @@ class UnrealManagerBase(object):
 			extraArgs = args[delimIndex+1:]
 			args = args[:delimIndex]
 		
+		# Determine if we are forcing the rediscovery of the list of automation tests
+		refresh = '--refresh' in args
+		args = Utility.stripArgs(args, ['--refresh'])
+		
+		# Determine if we are aborting the test run on the first failure, and whether we are writing any reports
+		failFast = '--fail-fast' in args
+		args = Utility.stripArgs(args, ['--fail-fast'])
+		reports = {}
+		for option in ['--junit', '--json']:
+			if option in args:
+				optionIndex = args.index(option)
+				if optionIndex + 1 >= len(args):
+					raise RuntimeError('the {} option requires a filename'.format(option))
+				reports[option] = os.path.abspath(args[optionIndex + 1])
+				args = args[:optionIndex] + args[optionIndex+2:]
+		
+		# Determine if we are splitting the tests across multiple concurrent Editor processes
+		numShards = None
+		if '--shards' in args:
+			optionIndex = args.index('--shards')
+			try:
+				numShards = int(args[optionIndex + 1])
+			except (IndexError, ValueError):
+				raise RuntimeError('the --shards option requires a number of shards')
+			if numShards < 1:
+				raise RuntimeError('the number of shards must be at least 1')
+			args = args[:optionIndex] + args[optionIndex+2:]
+		
 		# Build the project if it isn't already built
 		Utility.printStderr('Ensuring project is built...')
 		self.buildDescriptor(dir, suppressOutput=True)
@@ -573,7 +834,7 @@ class UnrealManagerBase(object):
 		projectFile = self.getProjectDescriptor(dir)
 		if '--list' in args:
 			Utility.printStderr('Retrieving automation test list...')
-			print('\n'.join(self.listAutomationTests(projectFile)))
+			print('\n'.join(self.listAutomationTests(projectFile, refresh)))
 		else:
 			
 			# Sanitise the user-supplied arguments to prevent command injection
@@ -582,6 +843,10 @@ class UnrealManagerBase(object):
 			sanitised = [arg.replace(',', '').replace(';', '') for arg in args if arg not in ['--all', '--filter']]
 			command = []
 			
+			# Filters are evaluated by the Editor, so we cannot determine the matching tests in order to distribute them across shards
+			if numShards is not None and runFilter == True:
+				raise RuntimeError('the --shards option cannot be combined with the --filter option')
+			
 			# Determine if we are enqueueing a 'RunAll' command
 			if runAll == True:
 				command.append('RunAll')
@@ -594,39 +859,283 @@ class UnrealManagerBase(object):
 			if len(sanitised) > 0:
 				command.append('RunTests Now ' + '+'.join(sanitised))
 			
-			# Attempt to run the automation tests
-			Utility.printStderr('Running automation tests...')
-			logOutput = self.runAutomationCommands(projectFile, command, extraArgs, capture=True, enableRHI=enableRHI)
+			# Attempt to run the automation tests, echoing the log output and analysing it in a single pass as it is produced
+			# (The analyser requests that the Editor be killed upon the first failure if fail-fast behaviour is enabled)
+			if numShards is not None:
+				analyser, aborted = self._runAutomationTestShards(projectFile, runAll, sanitised, numShards, extraArgs, enableRHI, failFast, refresh)
+			else:
+				Utility.printStderr('Running automation tests...')
+				analyser = AutomationLogAnalyser(failFast)
+				logOutput = self.streamAutomationCommands(projectFile, command, extraArgs, enableRHI=enableRHI, echo=True, lineCallback=analyser.processLine)
+				aborted = logOutput.aborted
+			
+			# Record the durations of the completed tests so future sharded runs can balance the shards
+			AutomationSharding.updateDurations(os.path.dirname(projectFile), analyser)
 			
-			# Propagate the log output
-			print(logOutput.stdout)
-			print(logOutput.stderr)
+			# Write any reports that were requested
+			if '--junit' in reports:
+				analyser.writeJUnitReport(reports['--junit'])
+			if '--json' in reports:
+				analyser.writeJsonReport(reports['--json'])
+			
+			# If the test run was aborted then report the failure that triggered it
+			if aborted == True:
+				Utility.printStderr('Aborted automation tests after the first failure: ' + analyser.firstFailure)
+				sys.exit(1)
 			
 			# Detect abnormal exit conditions (those not triggered by `automation quit`)
-			# In Unreal Engine 4.27.0, the exit method changed from RequestExit to RequestExitWithStatus
-			if 'PlatformMisc::RequestExit(' not in logOutput.stdout and 'PlatformMisc::RequestExitWithStatus(' not in logOutput.stdout:
+			if analyser.exitedNormally == False:
 				sys.exit(1)
 			
 			# Since UE4 doesn't consistently produce accurate exit codes across all platforms, we need to rely on
 			# text-based heuristics to detect failed automation tests or errors related to not finding any tests to run
-			errorStrings = [
-				'Incorrect automation command syntax!',
-				'Automation Test Failed',
-				'Result={Failed}',
-				'Found 0 Automation Tests, based on',
-				'is not a valid flag to filter on!'
-			]
-			for errorStr in errorStrings:
-				if errorStr in logOutput.stdout:
-					sys.exit(1)
+			if len(analyser.errors) > 0:
+				sys.exit(1)
 			
-			# If an explicit exit code was specified in the output text then identify it and propagate it
-			match = re.search('TEST COMPLETE\\. EXIT CODE: ([0-9]+)', logOutput.stdout + logOutput.stderr)
-			if match is not None:
-				sys.exit(int(match.group(1)))
+			# If an explicit exit code was specified in the output text then propagate it
+			if analyser.exitCode is not None:
+				sys.exit(analyser.exitCode)
 	
 	# "Protected" methods
 	
+	def _automationCommand(self, projectFile, commands, extraArgs, enableRHI):
+		"""
+		Returns the shell command that invokes the Automation Test commandlet for the specified project with the supplied automation test commands
+		"""
+		
+		# IMPORTANT IMPLEMENTATION NOTE:
+		# We need to format the command as a string and execute it using a shell in order to
+		# ensure the "-ExecCmds" argument will be parsed correctly under Windows. This is because
+		# the WinMain() function uses GetCommandLineW() to retrieve the raw command-line string,
+		# rather than using an argv-style structure. The string is then passed to FParse::Value(),
+		# which checks for the presence of a quote character after the equals sign to determine if
+		# whitespace should be stripped or preserved. Without the quote character, the spaces in the
+		# argument payload will be stripped out, corrupting our list of automation commands and
+		# preventing them from executing correctly.
+		
+		command = '{} {}'.format(Utility.escapePathForShell(self.getEditorBinary(True)), Utility.escapePathForShell(projectFile))
+		command += ' -game -buildmachine -stdout -fullstdoutlogoutput -forcelogflush -unattended -nopause -nosplash'
+		if enableRHI == False:
+			command += ' -nullrhi'
+		command += ' -ExecCmds="automation {};quit" '.format(';'.join(commands))
+		command += ' '.join([Utility.escapePathForShell(a) for a in extraArgs])
+		return command
+	
+	def _packageProject(self, dir, configuration, extraArgs, compileEditor=True, logFile=None, env=None):
+		"""
+		Packages a build of the Unreal project in the specified directory for a single platform. If `compileEditor` is False then the
+		Editor modules for the project must already have been built, and if `logFile` is specified then the UAT output is written to it.
+		"""
+		
+		# Strip out the `-NoCompileEditor` flag if the user has specified it, since the Development version
+		# of the Editor modules for the project are needed in order to run the commandlet that cooks content
+		# (When packaging for multiple platforms, we build the Editor modules once up front and then skip compiling them for each platform)
+		extraArgs = Utility.stripArgs(extraArgs, ['-nocompileeditor']) + ([] if compileEditor == True else ['-nocompileeditor'])
+		
+		# Check if the user specified the `--full` flag to force all of the packaging phases to run
+		unstripped = list(extraArgs)
+		extraArgs = Utility.stripArgs(extraArgs, ['--full'])
+		full = len(unstripped) > len(extraArgs)
+		
+		# Prevent the user from specifying multiple `-platform=` or `-targetplatform=` arguments,
+		# and use the current host platform if no platform argument was explicitly specified
+		platformArgs = Utility.findArgs(extraArgs, ['-platform=', '-targetplatform='])
+		platform = Utility.getArgValue(platformArgs[0]) if len(platformArgs) > 0 else self.getPlatformIdentifier()
+		extraArgs = Utility.stripArgs(extraArgs, platformArgs) + ['-platform={}'.format(platform)]
+		
+		# If we are building a dedicated server then ensure the server platform is set correctly
+		serverArg = Utility.findArgs(extraArgs, ['-server'])
+		serverPlatformArg = Utility.findArgs(extraArgs, ['-serverplatform=', '-servertargetplatform='])
+		if len(serverArg) > 0 and len(serverPlatformArg) == 0:
+			extraArgs.append('-serverplatform={}'.format(platform))
+		
+		# If we are packaging a Shipping build, do not include debug symbols unless explicitly requested
+		preserveDebugArg = Utility.findArgs(extraArgs, ['-debuginfo'])
+		extraArgs = Utility.stripArgs(extraArgs, ['-debuginfo'])
+		if configuration == 'Shipping' and len(preserveDebugArg) == 0:
+			extraArgs.append('-nodebuginfo')
+		
+		# Define the usage of pak files, default value is pak files for all platforms except HTML5
+		pakArg = Utility.findArgs(extraArgs, ['-pak', '-package'])
+		if len(pakArg) == 0:
+			pakArg = '-package' if platform.upper() == 'HTML5' else '-pak'
+		else:
+			pakArg = ''
+		
+		# Include the `-allmaps` flag if we are building a client target and haven't specified a list of maps
+		buildingClient = (len(Utility.findArgs(extraArgs, ['-noclient'])) == 0)
+		specifiedMaps = (len(Utility.findArgs(extraArgs, ['-MapsToCook', '-MapIniSectionsToCook'])) > 0)
+		if buildingClient == True and specifiedMaps == False:
+			extraArgs.append('-allmaps')
+		
+		# Automatically set the archive directory if the user has not explicitly specified one
+		if (len(Utility.findArgs(extraArgs, ['-archivedirectory='])) == 0):
+			extraArgs.extend(['-archivedirectory=' + os.path.join(os.path.abspath(dir), 'dist')])
+		
+		# Fingerprint the code and content inputs separately before packaging, so any changes made while packaging will be detected next time
+		projectFile = self.getProjectDescriptor(dir)
+		packageKey = '{}|{}'.format(platform, configuration)
+		fingerprintArgs = sorted(extraArgs) + [configuration, pakArg]
+		codeInputs = BuildManifest.inputsFingerprint(dir, projectFile, fingerprintArgs, self._getEngineVersionHash())
+		contentInputs = BuildManifest.contentFingerprint(dir, projectFile, fingerprintArgs, self._getEngineVersionHash())
+		
+		# Skip the build phase if the code is unchanged since the last successful package for this platform and configuration, and only skip
+		# the cook phase if both the code and content are unchanged, since cooked content depends on the compiled code (e.g. UObject layouts
+		# and serialisation), iteratively cooking otherwise (unless the user has requested a full run or has chosen these flags themselves)
+		phaseArgs = ['-cook', '-build']
+		previous = BuildManifest.getPackageRecord(dir, packageKey)
+		archiveDir = Utility.getArgValue(Utility.findArgs(extraArgs, ['-archivedirectory='])[0])
+		userPhaseArgs = Utility.findArgs(extraArgs, ['-skipbuild', '-skipcook', '-iterate'])
+		if full == False and previous is not None and os.path.isdir(archiveDir) and len(userPhaseArgs) == 0:
+			codeUnchanged = previous['code'] == codeInputs
+			contentUnchanged = previous['content'] == contentInputs
+			phaseArgs = [
+				'-skipbuild' if codeUnchanged == True else '-build'
+			] + (['-skipcook'] if codeUnchanged == True and contentUnchanged == True else ['-cook', '-iterate'])
+			Utility.printStderr('Code is {}, content is {} since the last package for {} {} (use --full to force a complete run).'.format(
+				'unchanged' if codeUnchanged == True else 'changed',
+				'unchanged' if contentUnchanged == True else 'changed',
+				platform,
+				configuration
+			))
+		
+		# Invoke UAT to package the build
+		self.runUAT([
+			'BuildCookRun'
+			] + extraArgs + [
+			'-utf8output',
+			'-clientconfig=' + configuration,
+			'-serverconfig=' + configuration,
+			'-project=' + projectFile,
+			'-noP4'
+			] + phaseArgs + [
+			'-stage',
+			'-prereqs',
+			pakArg,
+			'-archive'
+		], logFile=logFile, env=env)
+		
+		# Record the fingerprints for the successful package
+		BuildManifest.recordPackage(dir, packageKey, codeInputs, contentInputs)
+	
+	def _packageProjectForPlatforms(self, dir, configuration, extraArgs, platforms, jobs=None):
+		"""
+		Packages builds of the Unreal project in the specified directory for each of the specified platforms, running up to
+		the specified number of packaging runs (or the number that fit within the host's resources) concurrently
+		"""
+		from concurrent.futures import ThreadPoolExecutor
+		from .HostResources import HostResources
+		
+		if len(Utility.findArgs(extraArgs, ['-platform=', '-targetplatform='])) > 0:
+			raise UnrealManagerException('the --platforms option cannot be combined with a -platform= or -targetplatform= argument')
+		
+		# Give each platform its own archive and staging directories and log file under the archive directory
+		archiveArgs = Utility.findArgs(extraArgs, ['-archivedirectory='])
+		archiveRoot = Utility.getArgValue(archiveArgs[0]) if len(archiveArgs) > 0 else os.path.join(os.path.abspath(dir), 'dist')
+		extraArgs = Utility.stripArgs(extraArgs, archiveArgs + Utility.findArgs(extraArgs, ['-stagingdirectory=']))
+		os.makedirs(os.path.join(archiveRoot, 'Logs'), exist_ok=True)
+		
+		# Build the Editor modules once up front, since every packaging run needs them in order to cook content
+		Utility.printStderr('Building Editor modules before packaging...')
+		self.buildDescriptor(dir, 'Development', 'Editor', [])
+		
+		# Size the concurrent runs so the UBT invocations they perform fit within the host's resources, and allow concurrent UAT and UBT
+		# instances (UAT and UBT both use single-instance mutexes by default, and UBT only supports concurrent runs from 4.22 onwards)
+		maxJobs = jobs if self._getEngineVersionTuple() >= (4, 22, 0) else 1
+		concurrentJobs, actionsPerJob = HostResources.planJobs(len(platforms), maxJobs)
+		env = dict(os.environ, uebp_UATMutexNoWait='1')
+		if concurrentJobs > 1:
+		
+			# Append the flags to any UBT arguments that the user has specified, unless the user has already specified them
+			ubtArgs = Utility.findArgs(extraArgs, ['-ubtargs='])
+			existing = [arg for ubtArg in ubtArgs for arg in Utility.getArgValue(ubtArg).strip('"').split()]
+			concurrencyArgs = [
+				arg for arg in ['-NoMutex', '-MaxParallelActions={}'.format(actionsPerJob)]
+				if len(Utility.findArgs(existing, [arg.split('=', 1)[0]])) == 0
+			]
+			if len(ubtArgs) > 0:
+				extraArgs = [(arg.split('=', 1)[0] + '=' + ' '.join([Utility.getArgValue(arg).strip('"')] + concurrencyArgs)) if arg in ubtArgs else arg for arg in extraArgs]
+			else:
+				extraArgs = extraArgs + ['-ubtargs=' + ' '.join(concurrencyArgs)]
+		
+		# Perform the packaging runs, reporting the outcome of each as it completes
+		Utility.printStderr('Packaging for {} platforms using {} concurrent runs...'.format(len(platforms), concurrentJobs))
+		# (Errors can occur before UAT writes anything to the log file, so we report the error for each failed run alongside its outcome)
+		errors = {}
+		def package(platform):
+			startTime = time.time()
+			logFile = os.path.join(archiveRoot, 'Logs', platform + '.log')
+			try:
+				open(logFile, 'wb').close()
+				self._packageProject(dir, configuration, extraArgs + [
+					'-platform=' + platform,
+					'-archivedirectory=' + os.path.join(archiveRoot, platform),
+					'-stagingdirectory=' + os.path.join(archiveRoot, 'Staging', platform)
+				], compileEditor=False, logFile=logFile, env=env)
+			except Exception as e:
+				errors[platform] = e
+			Utility.printStderr('{}: {} in {:.1f}s (log: {}){}'.format(
+				platform,
+				'failed' if platform in errors else 'succeeded',
+				time.time() - startTime,
+				logFile,
+				': {}'.format(errors[platform]) if platform in errors else ''
+			))
+		
+		with ThreadPoolExecutor(max_workers=concurrentJobs) as executor:
+			list(executor.map(package, platforms))
+		
+		failed = ['{} ({})'.format(platform, errors[platform]) for platform in platforms if platform in errors]
+		if len(failed) > 0:
+			raise UnrealManagerException('packaging failed for the following platforms: {}'.format(', '.join(failed)))
+	
+	def _runAutomationTestShards(self, projectFile, runAll, testNames, numShards, extraArgs, enableRHI, failFast, refresh):
+		"""
+		Runs the selected automation tests split across multiple concurrent Editor processes, returning a merged
+		AutomationLogAnalyser for the entire test run and whether the test run was aborted
+		"""
+		from concurrent.futures import ThreadPoolExecutor
+		import threading
+		
+		# Determine which tests are selected and partition them into shards using the historical test durations
+		Utility.printStderr('Retrieving automation test list...')
+		projectDir = os.path.dirname(projectFile)
+		available = self.listAutomationTests(projectFile, refresh)
+		tests = available if runAll == True else AutomationSharding.selectTests(available, testNames)
+		if len(tests) == 0:
+			raise RuntimeError('no automation tests match the specified test names')
+		shards = AutomationSharding.partition(tests, AutomationSharding.getDurations(projectDir), numShards)
+		
+		# Each shard has its own log file and user directory, so the Editor processes do not contend for the same files
+		Utility.printStderr('Running {} automation tests across {} shards...'.format(len(tests), len(shards)))
+		analysers = [AutomationLogAnalyser(failFast) for shard in shards]
+		abort = threading.Event()
+		def runShard(index):
+			shardDir = AutomationSharding.shardDirectory(projectDir, index)
+			os.makedirs(shardDir, exist_ok=True)
+			
+			# Report the result of each test as it completes, and stop every shard once any shard requests an abort
+			def processLine(stream, line):
+				if analysers[index].processLine(stream, line) == True:
+					abort.set()
+				if 'Test Completed.' in line:
+					print('[Shard {}] {}'.format(index, line.strip()), flush=True)
+				return abort.is_set()
+			
+			shardArgs = ['-abslog=' + os.path.join(shardDir, 'Automation.log'), '-userdir=' + shardDir]
+			commands = ['RunTests Now ' + '+'.join([name.replace(',', '').replace(';', '') for name in shards[index]])]
+			return self.streamAutomationCommands(projectFile, commands, shardArgs + extraArgs, enableRHI=enableRHI, lineCallback=processLine)
+		
+		with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+			outputs = list(executor.map(runShard, range(len(shards))))
+		
+		# Report any shard whose Editor did not exit normally, since its log output is not echoed
+		for index, output in enumerate(outputs):
+			if output.aborted == False and analysers[index].exitedNormally == False:
+				Utility.printStderr('Shard {} did not exit normally. The trailing output was: "{}"'.format(index, output.tail()))
+		
+		return AutomationLogAnalyser.merge(analysers), abort.is_set()
+	
 	def _detectEngineRoot(self):
 		"""
 		Determines the root directory location of the latest installed version of UE4
@@ -635,19 +1144,29 @@ class UnrealManagerBase(object):
 	
 	def _getEngineVersionDetails(self):
 		"""
-		Parses the JSON version details for the latest installed version of UE4
+		Returns the parsed JSON version details for the latest installed version of UE4
 		"""
-		versionFile = os.path.join(self.getEngineRoot(), 'Engine', 'Build', 'Build.version')
-		return json.loads(Utility.readFile(versionFile))
+		return self.getEngineSnapshot().versionDetails
 	
 	def _getEngineVersionHash(self):
 		"""
-		Computes the SHA-256 hash of the JSON version details for the latest installed version of UE4
+		Returns the SHA-256 hash of the JSON version details for the latest installed version of UE4
+		"""
+		return self.getEngineSnapshot().versionHash
+	
+	def _resolveEditorBinary(self, snapshot, cmdVersion):
+		"""
+		Determines the location of the UE4Editor/UnrealEditor binary for the supplied engine snapshot
 		"""
-		versionDetails = self._getEngineVersionDetails()
-		hash = hashlib.sha256()
-		hash.update(json.dumps(versionDetails, sort_keys=True, indent=0).encode('utf-8'))
-		return hash.hexdigest()
+		editorName = 'UnrealEditor' if snapshot.versionDetails['MajorVersion'] >= 5 else 'UE4Editor'
+		return os.path.join(snapshot.root, 'Engine', 'Binaries', self.getPlatformIdentifier(), editorName + self._editorPathSuffix(cmdVersion))
+	
+	def _getEngineVersionTuple(self):
+		"""
+		Returns the (major, minor, patch) version tuple for the latest installed version of UE4, suitable for comparisons
+		"""
+		version = self._getEngineVersionDetails()
+		return (version['MajorVersion'], version['MinorVersion'], version['PatchVersion'])
 	
 	def _editorPathSuffix(self, cmdVersion):
 		"""
@@ -655,6 +1174,31 @@ class UnrealManagerBase(object):
 		"""
 		pass
 	
+	def _executableSuffix(self):
+		"""
+		Returns the file extension for executables on the host platform
+		"""
+		pass
+	
+	def _getToolBinary(self, target, configuration):
+		"""
+		Returns the location of the binary for the specified Engine tool and build configuration
+		"""
+		name = target if configuration == 'Development' else '{}-{}-{}'.format(target, self.getPlatformIdentifier(), configuration)
+		return os.path.join(self.getEngineRoot(), 'Engine', 'Binaries', self.getPlatformIdentifier(), name + self._executableSuffix())
+	
+	def _toolStampIsValid(self, snapshot, stampKey, binary):
+		"""
+		Determines if the recorded stamp for an Engine tool matches the current engine snapshot and tool binary
+		"""
+		stamp = CachedDataManager.getCachedDataKey(snapshot.versionHash, stampKey)
+		try:
+			details = os.stat(binary)
+		except OSError:
+			return False
+		
+		return stamp is not None and stamp == {'versionMtime': snapshot.versionMtime, 'size': details.st_size, 'mtime': details.st_mtime_ns}
+	
 	def _runDotNetApplication(self, exeFile, args = []):
 		"""
 		Runs a .NET application and captures the output
@@ -685,21 +1229,117 @@ class UnrealManagerBase(object):
 		"""
 		return platform
 	
-	def _runUnrealBuildTool(self, target, platform, configuration, args, capture=False):
+	def _runUnrealBuildTool(self, target, platform, configuration, args, capture=False, logFile=None):
 		"""
-		Invokes UnrealBuildTool with the specified parameters
+		Invokes UnrealBuildTool with the specified parameters, appending its output to the specified log file if one is specified
 		"""
 		platform = self._transformBuildToolPlatform(platform)
-		arguments = [self.getBuildScript(), target, platform, configuration] + args
-		if capture == True:
+		arguments = [self.getEngineSnapshot().buildScript, target, platform, configuration] + args + self._parallelismArgs(args)
+		if logFile is not None:
+			Utility.run(arguments, cwd=self.getEngineRoot(), raiseOnError=True, logFile=logFile)
+		elif capture == True:
 			return Utility.capture(arguments, cwd=self.getEngineRoot(), raiseOnError=True)
 		else:
 			Utility.run(arguments, cwd=self.getEngineRoot(), raiseOnError=True)
 	
+	def _runUnrealBuildToolBatch(self, builds, args, suppressOutput=False, logFile=None):
+		"""
+		Builds each of the specified (target, configuration, targetArgs) tuples for the host platform, using a single UBT invocation
+		where supported, and returns a list indicating whether each build succeeded. Failures of multiple builds are reported rather than raised.
+		(If `logFile` is specified then the output of each UBT invocation is appended to it)
+		"""
+		platform = self.getPlatformIdentifier()
+		
+		# A single build is performed exactly as it always has been, propagating any failure
+		if len(builds) == 1:
+			target, configuration, targetArgs = builds[0]
+			self._runUnrealBuildTool(target, platform, configuration, targetArgs + args, suppressOutput, logFile)
+			return [True]
+		
+		# From Unreal Engine 4.22 onwards, UBT accepts multiple `-Target` arguments, so it only needs to start up and load its makefiles once
+		# (Since a failure of any target fails the entire invocation, we then fall back to building each target separately so we can report which ones failed)
+		results = None
+		if self._getEngineVersionTuple() >= (4, 22, 0):
+			ubtPlatform = self._transformBuildToolPlatform(platform)
+			targetArgs = [
+				'-Target=' + ' '.join([target, ubtPlatform, configuration] + ['"{}"'.format(arg) if ' ' in arg else arg for arg in extraArgs])
+				for target, configuration, extraArgs in builds
+			]
+			arguments = [self.getEngineSnapshot().buildScript] + targetArgs + args + self._parallelismArgs(args)
+			try:
+				if logFile is not None:
+					Utility.run(arguments, cwd=self.getEngineRoot(), raiseOnError=True, logFile=logFile)
+				elif suppressOutput == True:
+					Utility.capture(arguments, cwd=self.getEngineRoot(), raiseOnError=True)
+				else:
+					Utility.run(arguments, cwd=self.getEngineRoot(), raiseOnError=True)
+				results = [True] * len(builds)
+			except Exception:
+				Utility.printStderr('Building the targets together failed, building each target separately to identify the failures...')
+		
+		# Build each of the targets separately if necessary, continuing past any failures
+		if results is None:
+			results = []
+			for target, configuration, targetArgs in builds:
+				try:
+					self._runUnrealBuildTool(target, platform, configuration, targetArgs + args, suppressOutput, logFile)
+					results.append(True)
+				except Exception:
+					results.append(False)
+		
+		# Report the result of each build
+		for (target, configuration, targetArgs), succeeded in zip(builds, results):
+			print('{} {} {}: {}'.format(target, platform, configuration, 'succeeded' if succeeded == True else 'failed'), flush=True)
+		
+		return results
+	
+	def _parallelismArgs(self, args):
+		"""
+		Returns the `-MaxParallelActions` argument that limits UBT to the number of parallel actions that fit within the host's CPU cores and
+		memory, if parallelism limits are enabled and the supplied arguments do not already specify a limit, or an empty list otherwise
+		"""
+		if os.environ.get('UE4CLI_LIMIT_PARALLEL_ACTIONS', '0') != '1' or len(Utility.findArgs(args, ['-MaxParallelActions='])) > 0:
+			return []
+		
+		from .HostResources import HostResources
+		return ['-MaxParallelActions={}'.format(HostResources.maxParallelActions())]
+	
+	def _raiseForFailedBuilds(self, builds, results):
+		"""
+		Raises an exception listing the failed builds, if there were any
+		"""
+		failed = ['{} {}'.format(build['ubtTarget'], build['configuration']) for build, succeeded in zip(builds, results) if succeeded == False]
+		if len(failed) > 0:
+			raise UnrealManagerException('the following builds failed: ' + ', '.join(failed))
+	
+	def _getMemoisedLibraryOutput(self, command, libs, options, render, configuration = 'Development'):
+		"""
+		Returns the memoised output of a library-related command if the underlying module index is unchanged, otherwise renders and memoises it
+		"""
+		from .UE4BuildInterrogator import UE4BuildInterrogator
+		snapshot = self.getEngineSnapshot()
+		qualifiers = UE4BuildInterrogator.cacheQualifiers(snapshot.root, self.getPlatformIdentifier(), configuration)
+		key = json.dumps([command, snapshot.root, list(libs), options])
+		
+		# If we have a memoised copy of the output then use it
+		output = CachedDataManager.getMemoisedOutput(snapshot.versionHash, 'ThirdPartyModuleIndex', qualifiers, key)
+		if output is not None:
+			return output
+		
+		# Render the output, and only memoise it if all of the requested libraries are supported, so any warnings are not lost
+		output = render()
+		supported = self.listThirdPartyLibs(configuration)
+		if len([lib for lib in libs if lib not in supported]) == 0:
+			CachedDataManager.setMemoisedOutput(snapshot.versionHash, 'ThirdPartyModuleIndex', qualifiers, key, output)
+		
+		return output
+	
 	def _getUE4BuildInterrogator(self):
 		"""
 		Uses UE4BuildInterrogator to interrogate UnrealBuildTool about third-party library details
 		"""
+		from .UE4BuildInterrogator import UE4BuildInterrogator
 		ubtLambda = lambda target, platform, config, args: self._runUnrealBuildTool(target, platform, config, args, True)
-		interrogator = UE4BuildInterrogator(self.getEngineRoot(), self._getEngineVersionDetails(), self._getEngineVersionHash(), ubtLambda)
+		snapshot = self.getEngineSnapshot()
+		interrogator = UE4BuildInterrogator(snapshot.root, snapshot.versionDetails, snapshot.versionHash, ubtLambda)
 		return interrogator
@@ -2,7 +2,6 @@ from .ThirdPartyLibraryDetails import ThirdPartyLibraryDetails
 from .UnrealManagerException import UnrealManagerException
 from .UnrealManagerUnix import UnrealManagerUnix
 from .Utility import Utility
-from pkg_resources import parse_version
 import glob, os
 
 class UnrealManagerDarwin(UnrealManagerUnix):
@@ -34,16 +33,14 @@ class UnrealManagerDarwin(UnrealManagerUnix):
 		return None
 	
 	def _editorPathSuffix(self, cmdVersion):
-		version = parse_version(self.getEngineVersion())
-		if version < parse_version('5.0.0'):
+		if self._getEngineVersionTuple() < (5, 0, 0):
 			return '.app/Contents/MacOS/UE4Editor'
 		else:
 			return '.app/Contents/MacOS/UnrealEditor'
 	
 	def _transformBuildToolPlatform(self, platform):
 		# Prior to 4.22.2, Build.sh under Mac requires "macosx" as the platform name for macOS
-		version = parse_version(self.getEngineVersion())
-		return 'macosx' if platform == 'Mac' and version < parse_version('4.22.2') else platform
+		return 'macosx' if platform == 'Mac' and self._getEngineVersionTuple() < (4, 22, 2) else platform
 	
 	def _getRunXBuildScript(self):
 		xbuildScript = super(UnrealManagerDarwin, self)._getRunXBuildScript()
@@ -1,21 +1,22 @@
 import platform
 
-# Import the implementation for the current platform
-if platform.system() == 'Windows':
-	from .UnrealManagerWindows import UnrealManagerWindows as UnrealManagerImp
-elif platform.system() == 'Darwin':
-	from .UnrealManagerDarwin import UnrealManagerDarwin as UnrealManagerImp
-else:
-	from .UnrealManagerLinux import UnrealManagerLinux as UnrealManagerImp
-
 class UnrealManagerFactory:
 	"""
 	Factory class for creating UnrealManagerBase instances
 	"""
 	
 	@staticmethod
-	def create():
+	def create(engineRoot=None):
 		"""
-		Creates an Unreal manager instance for the current platform
+		Creates an Unreal manager instance for the current platform, optionally for a specific engine root directory
 		"""
-		return UnrealManagerImp()
+		
+		# Import the implementation for the current platform (deferred until needed, since it pulls in most of the package)
+		if platform.system() == 'Windows':
+			from .UnrealManagerWindows import UnrealManagerWindows as UnrealManagerImp
+		elif platform.system() == 'Darwin':
+			from .UnrealManagerDarwin import UnrealManagerDarwin as UnrealManagerImp
+		else:
+			from .UnrealManagerLinux import UnrealManagerLinux as UnrealManagerImp
+		
+		return UnrealManagerImp(engineRoot)
@@ -1,7 +1,8 @@
+from .CachedDataManager import CachedDataManager
+from .EngineSnapshot import EngineSnapshot
 from .ThirdPartyLibraryDetails import ThirdPartyLibraryDetails
 from .UnrealManagerException import UnrealManagerException
 from .UnrealManagerUnix import UnrealManagerUnix
-from .Utility import Utility
 import re, os
 
 class UnrealManagerLinux(UnrealManagerUnix):
@@ -10,40 +11,40 @@ class UnrealManagerLinux(UnrealManagerUnix):
 		return 'Linux'
 	
 	def _detectEngineRoot(self):
+		from .EngineRegistry import EngineRegistry
 		
-		# FIXME: With current setup, 'UE4Editor' can be returned instead of:
-		# 'UnrealEditor.desktop' or 'com.epicgames.UnrealEngineEditor.desktop',
-		# which will mean that NOT the highest version will be returned.
-		# Such case would be very rare (mixing different ways of installations) but it can happen!
-		# (this was always a problem)
+		# If we have previously detected the engine root under the same environment and with the same set of installed engines,
+		# use the cached result if it is still valid (Validating the cached result only requires resolving the editor location
+		# and stat'ing the `Build.version` file, and the engine registry is itself cached)
+		engines = EngineRegistry.listEngines()
+		inputs = {'PATH': os.environ.get('PATH', ''), 'HOME': os.environ.get('HOME', ''), 'engines': [engine['root'] for engine in engines]}
+		cached = CachedDataManager.getHostDataKey('DetectedEngineRoot')
+		if cached is not None and cached['inputs'] == inputs and cached['token'] == self._engineRootToken(cached['root'], cached['token']['editorLoc']):
+			return cached['root']
 		
-		# If UE4Editor/UnrealEditor is available in the PATH, use its location to detect the root directory path
-		potentialEditorLocs = [
-			Utility.capture(['which', 'UnrealEditor']).stdout.strip(),
-			Utility.capture(['which', 'UE4Editor']).stdout.strip(),
-		]
-		for editorLoc in potentialEditorLocs:
-			if editorLoc != '':
-				editorLoc = os.path.dirname(os.path.realpath(editorLoc))
-				return os.path.abspath(editorLoc + '/../../..')
+		# Gather the engines referenced by the PATH and desktop integration along with those found by the engine registry,
+		# and select the newest, since the different installation methods may each refer to a different version of the engine
+		candidates = [(os.path.abspath(self._resolveEditorDirectory(editorLoc) + '/../../..'), editorLoc) for editorLoc in self._detectEditorLocations()]
+		candidates.extend([(engine['root'], os.path.join(engine['root'], 'Engine', 'Binaries', 'Linux')) for engine in engines])
+		newest, newestKey = None, None
+		for root, editorLoc in candidates:
+			details = EngineRegistry.probe(root)
+			if details is not None and (newestKey is None or (details['versionTuple'], details['changelist']) > newestKey):
+				newest, newestKey = (root, editorLoc), (details['versionTuple'], details['changelist'])
 		
-		# Under Debian-based systems, we can use the desktop integration to find UE4Editor/UnrealEditor
-		potentialLauncherPaths = [
-			os.path.join(os.environ['HOME'], '.local', 'share', 'applications', 'UnrealEditor.desktop'),
-			os.path.join(os.environ['HOME'], '.local', 'share', 'applications', 'com.epicgames.UnrealEngineEditor.desktop'),
-			os.path.join(os.environ['HOME'], '.local', 'share', 'applications', 'UE4.desktop'),
-		]
-		for launcherPath in potentialLauncherPaths:
-			if os.path.exists(launcherPath):
-				with open(launcherPath, 'r') as f:
-					launcherData = f.read()
-					match = re.search('Path=(.*)\n', launcherData)
-					if match != None:
-						editorLoc = os.path.realpath(match.group(1))
-						return os.path.abspath(editorLoc + '/../../..')
+		# If none of the candidates contain a valid engine then fall back to the first editor location we detected, as we always have
+		if newest is None:
+			if len(candidates) == 0:
+				return None
+			newest = candidates[0]
 		
-		# Could not auto-detect the Unreal Engine location
-		return None
+		# Cache the result, along with the token that we use to validate it
+		root, editorLoc = newest
+		token = self._engineRootToken(root, editorLoc)
+		if token is not None:
+			CachedDataManager.setHostDataKey('DetectedEngineRoot', {'root': root, 'inputs': inputs, 'token': token})
+		
+		return root
 	
 	def _editorPathSuffix(self, cmdVersion):
 		return ''
@@ -71,3 +72,62 @@ class UnrealManagerLinux(UnrealManagerUnix):
 		)
 		
 		return {'libc++': libCXXDetailsOverride}
+	
+	
+	# "Private" methods
+	
+	def _detectEditorLocations(self):
+		"""
+		Determines the locations of the editor binaries (or the directories containing them) referenced by the PATH and the desktop integration
+		"""
+		
+		# If UE4Editor/UnrealEditor is available in the PATH, use its location to detect the root directory path
+		# (We search the PATH ourselves rather than running `which`, to avoid spawning child processes)
+		import shutil
+		editorLocs = [
+			editorLoc for editorLoc in [shutil.which('UnrealEditor'), shutil.which('UE4Editor')]
+			if editorLoc is not None
+		]
+		
+		# Under Debian-based systems, we can use the desktop integration to find UE4Editor/UnrealEditor
+		applicationsDir = os.path.join(os.path.expanduser('~'), '.local', 'share', 'applications')
+		potentialLauncherPaths = [
+			os.path.join(applicationsDir, 'UnrealEditor.desktop'),
+			os.path.join(applicationsDir, 'com.epicgames.UnrealEngineEditor.desktop'),
+			os.path.join(applicationsDir, 'UE4.desktop'),
+		]
+		for launcherPath in potentialLauncherPaths:
+			if os.path.exists(launcherPath):
+				with open(launcherPath, 'r') as f:
+					launcherData = f.read()
+					match = re.search('Path=(.*)\n', launcherData)
+					if match != None:
+						editorLocs.append(match.group(1))
+		
+		return editorLocs
+	
+	def _resolveEditorDirectory(self, editorLoc):
+		"""
+		Resolves the real path of the directory containing the editor binary
+		"""
+		editorLoc = os.path.realpath(editorLoc)
+		return editorLoc if os.path.isdir(editorLoc) else os.path.dirname(editorLoc)
+	
+	def _engineRootToken(self, root, editorLoc):
+		"""
+		Returns the token used to validate a cached engine root, or None if the editor or the engine root no longer exist
+		"""
+		if os.path.exists(editorLoc) == False:
+			return None
+		
+		try:
+			versionStat = os.stat(EngineSnapshot.versionFileForRoot(root))
+		except OSError:
+			return None
+		
+		return {
+			'editorLoc': editorLoc,
+			'editorDir': self._resolveEditorDirectory(editorLoc),
+			'versionMtime': versionStat.st_mtime,
+			'versionInode': versionStat.st_ino
+		}
@@ -13,6 +13,9 @@ class UnrealManagerUnix(UnrealManagerBase):
 	def getRunUATScript(self):
 		return os.path.join(self.getEngineRoot(), 'Engine', 'Build', 'BatchFiles', 'RunUAT.sh')
 	
+	def _executableSuffix(self):
+		return ''
+	
 	def _runDotNetApplication(self, exeFile, args = []):
 		scriptFile = self._getRunMonoScript()
 		scriptDir = os.path.dirname(scriptFile)
@@ -76,6 +76,9 @@ class UnrealManagerWindows(UnrealManagerBase):
 	def _editorPathSuffix(self, cmdVersion):
 		return '-Cmd.exe' if cmdVersion == True else '.exe'
 	
+	def _executableSuffix(self):
+		return '.exe'
+	
 	def _runDotNetApplication(self, exeFile, args = []):
 		return Utility.capture([exeFile] + args, raiseOnError=True)
 	
@@ -1,4 +1,10 @@
-import os, platform, shlex, subprocess, sys
+import os, platform, sys
+
+# The number of trailing output lines that Utility.captureStreaming() retains by default
+DEFAULT_TAIL_LINES = 200
+
+# The prefix for directories that Utility.removeDirectories() has renamed aside for deletion in the background
+DELETION_PREFIX = '.ue4cli-deleting-'
 
 class CommandOutput(object):
 	"""
@@ -9,6 +15,27 @@ class CommandOutput(object):
 		self.stdout = stdout
 		self.stderr = stderr
 
+class StreamingCommandOutput(object):
+	"""
+	Helper class to wrap the output of Utility.captureStreaming(), which retains only a bounded amount of the output in memory
+	"""
+	def __init__(self, tailLines):
+		from collections import deque
+		self.returncode = None
+		self.aborted = False
+		self.lineCount = 0
+		self._tail = deque(maxlen=tailLines)
+	
+	def tail(self):
+		"""
+		Returns the trailing lines of the combined output
+		"""
+		return ''.join(self._tail)
+	
+	def _append(self, line):
+		self.lineCount += 1
+		self._tail.append(line)
+
 
 class Utility:
 	"""
@@ -67,6 +94,7 @@ class Utility:
 		if platform.system() == 'Windows':
 			return '"{}"'.format(path.replace('"', '""'))
 		else:
+			import shlex
 			return shlex.quote(path)
 	
 	@staticmethod
@@ -113,6 +141,7 @@ class Utility:
 		"""
 		Executes a child process and captures its output
 		"""
+		import subprocess
 		
 		# If verbose output is enabled, print the command that will be executed
 		Utility._printCommand(command)
@@ -133,19 +162,141 @@ class Utility:
 		return CommandOutput(proc.returncode, stdout, stderr)
 	
 	@staticmethod
-	def run(command, cwd=None, shell=False, raiseOnError=False):
+	def captureStreaming(command, cwd=None, shell=False, echo=False, lineCallback=None, tailLines=DEFAULT_TAIL_LINES, raiseOnError=False):
 		"""
-		Executes a child process and waits for it to complete
+		Executes a child process and processes its output line by line as it is produced, without buffering all of it in memory.
+		
+		Each line can optionally be echoed to our own stdout or stderr, and is passed to `lineCallback(stream, line)` (if supplied).
+		If `lineCallback` returns True then the child process (and any processes it has spawned) will be killed.
+		Only the trailing `tailLines` lines of output are retained.
 		"""
+		import io, subprocess, threading
 		
 		# If verbose output is enabled, print the command that will be executed
 		Utility._printCommand(command)
 		
-		returncode = subprocess.call(command, cwd=cwd, shell=shell)
+		output = StreamingCommandOutput(tailLines)
+		
+		# Lines from stdout and stderr are read by separate threads, so serialise the processing of each line
+		# (If processing fails then we keep draining the pipes, so the child process never blocks on a full pipe)
+		lock = threading.Lock()
+		errors = []
+		def process(stream, pipe, echoTarget):
+			for line in io.TextIOWrapper(pipe, encoding='utf-8', errors='replace'):
+				with lock:
+					if len(errors) > 0:
+						continue
+					try:
+						if echo == True:
+							echoTarget.write(line)
+							echoTarget.flush()
+						output._append(line)
+						if lineCallback is not None and lineCallback(stream, line) == True and output.aborted == False:
+							output.aborted = True
+							Utility._killProcessTree(proc)
+					except Exception as e:
+						errors.append(e)
+		
+		# Attempt to execute the child process, reading its output as it is produced
+		# (Under Unix-like platforms the child is placed in its own session, so we can kill any processes it spawns along with it)
+		newSession = platform.system() != 'Windows'
+		proc = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd, shell=shell, start_new_session=newSession)
+		readers = [
+			threading.Thread(target=process, args=('stdout', proc.stdout, sys.stdout), daemon=True),
+			threading.Thread(target=process, args=('stderr', proc.stderr, sys.stderr), daemon=True)
+		]
+		try:
+			for reader in readers:
+				reader.start()
+			for reader in readers:
+				reader.join()
+			output.returncode = proc.wait()
+		finally:
+			if proc.poll() is None:
+				Utility._killProcessTree(proc)
+		
+		# Propagate any error that occurred whilst processing the output
+		if len(errors) > 0:
+			raise errors[0]
+		
+		# If the child process failed and we were asked to raise an exception, do so (including only the trailing output)
+		if raiseOnError == True and output.returncode != 0:
+			raise Exception(
+				'child process ' + str(command) +
+				' failed with exit code ' + str(output.returncode) +
+				'\nlast {} lines of output: "'.format(len(output._tail)) + output.tail() + '"'
+			)
+		
+		return output
+	
+	@staticmethod
+	def run(command, cwd=None, shell=False, raiseOnError=False, logFile=None, env=None):
+		"""
+		Executes a child process and waits for it to complete, appending its combined output to the specified log file if one is specified
+		"""
+		import subprocess
+		
+		# If verbose output is enabled, print the command that will be executed
+		Utility._printCommand(command)
+		
+		if logFile is not None:
+			with open(logFile, 'ab') as log:
+				returncode = subprocess.call(command, cwd=cwd, shell=shell, env=env, stdout=log, stderr=subprocess.STDOUT)
+		else:
+			returncode = subprocess.call(command, cwd=cwd, shell=shell, env=env)
 		if raiseOnError == True and returncode != 0:
 			raise Exception('child process ' + str(command) + ' failed with exit code ' + str(returncode))
 		return returncode
 	
+	@staticmethod
+	def removeDirectories(directories, background=False):
+		"""
+		Removes the specified directories concurrently. If `background` is True, the directories are instead renamed aside
+		(which is near-instantaneous) and then deleted by a detached child process, so the caller does not need to wait.
+		"""
+		directories = [directory for directory in directories if os.path.isdir(directory)]
+		if background == True:
+		
+			# Renaming a directory within its parent directory never crosses a filesystem boundary, so the rename is atomic
+			import uuid
+			aside = []
+			for directory in directories:
+				renamed = os.path.join(os.path.dirname(directory), DELETION_PREFIX + os.path.basename(directory) + '-' + uuid.uuid4().hex[:8])
+				try:
+					os.rename(directory, renamed)
+					aside.append(renamed)
+				except OSError:
+					aside.append(directory)
+			
+			if len(aside) > 0:
+				import subprocess
+				detach = {'creationflags': 0x00000008} if platform.system() == 'Windows' else {'start_new_session': True}
+				subprocess.Popen(
+					[sys.executable, '-c', 'import shutil, sys\nfor directory in sys.argv[1:]: shutil.rmtree(directory, ignore_errors=True)'] + aside,
+					stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **detach
+				)
+		
+		elif len(directories) > 0:
+			import shutil
+			from concurrent.futures import ThreadPoolExecutor
+			with ThreadPoolExecutor(max_workers=min(len(directories), 16)) as executor:
+				list(executor.map(lambda directory: shutil.rmtree(directory, ignore_errors=True), directories))
+	
+	@staticmethod
+	def _killProcessTree(proc):
+		"""
+		Kills a child process started by captureStreaming() along with any processes it has spawned
+		"""
+		import subprocess
+		try:
+			if platform.system() == 'Windows':
+				subprocess.call(['taskkill', '/F', '/T', '/PID', str(proc.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+			else:
+				import signal
+				os.killpg(proc.pid, signal.SIGKILL)
+		except OSError:
+			pass
+	
 	@staticmethod
 	def _printCommand(command):
 		"""
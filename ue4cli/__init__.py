@@ -1,4 +1,25 @@
-from .UnrealManagerBase import UnrealManagerBase
-from .UnrealManagerException import UnrealManagerException
-from .UnrealManagerFactory import UnrealManagerFactory
-from .ThirdPartyLibraryDetails import PrintingFormat, ThirdPartyLibraryDetails
+import importlib, sys
+
+# The public classes exported by the package, mapped to the modules that define them
+_EXPORTS = {
+	'UnrealManagerBase': 'UnrealManagerBase',
+	'UnrealManagerException': 'UnrealManagerException',
+	'UnrealManagerFactory': 'UnrealManagerFactory',
+	'PrintingFormat': 'ThirdPartyLibraryDetails',
+	'ThirdPartyLibraryDetails': 'ThirdPartyLibraryDetails'
+}
+
+__all__ = list(_EXPORTS)
+
+# Under Python 3.7 and newer the exported classes are imported on first access, so that
+# running the `ue4` command only imports the modules that the invoked command actually uses
+if sys.version_info >= (3, 7):
+	def __getattr__(name):
+		if name in _EXPORTS:
+			return getattr(importlib.import_module('.' + _EXPORTS[name], __name__), name)
+		raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+else:
+	from .UnrealManagerBase import UnrealManagerBase
+	from .UnrealManagerException import UnrealManagerException
+	from .UnrealManagerFactory import UnrealManagerFactory
+	from .ThirdPartyLibraryDetails import PrintingFormat, ThirdPartyLibraryDetails
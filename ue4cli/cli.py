@@ -1,7 +1,13 @@
 from collections import OrderedDict
+from .CachedDataManager import CachedDataManager
+from .ConfigurationManager import ConfigurationManager
+from .DaemonManager import DAEMON_COMMANDS, DaemonManager
+from .EngineRegistry import EngineRegistry
+from .EngineSnapshot import EngineSnapshot
 from .PluginManager import PluginManager
 from .UnrealManagerException import UnrealManagerException
 from .UnrealManagerFactory import UnrealManagerFactory
+from .Utility import Utility
 import os, sys
 
 # Our list of supported commands
@@ -21,16 +27,34 @@ SUPPORTED_COMMANDS = {
 	
 	'clearroot': {
 		'description': 'Removes any previously-specified engine root path override',
-		'action': lambda m, args: m.clearEngineRootOverride(),
+		'action': lambda m, args: ConfigurationManager.setConfigKey('rootDirOverride', None),
 		'args': None
 	},
 	
 	'clearcache': {
 		'description': 'Clears any cached data that ue4cli has stored',
-		'action': lambda m, args: m.clearCachedData(),
+		'action': lambda m, args: CachedDataManager.clearCache(),
 		'args': None
 	},
 	
+	'cache': {
+		'description': 'Populate the library cache for each combination of the specified configurations and platforms in parallel, or list the cached entries',
+		'action': lambda m, args: handleCacheCommand(m, args),
+		'args': 'warm [--configs CONFIG1,CONFIG2] [--platforms PLATFORM1,PLATFORM2] [--jobs N] | list'
+	},
+	
+	'daemon': {
+		'description': 'Run a resident process that answers engine and library queries over a Unix domain socket, or control a running one',
+		'action': lambda m, args: DaemonManager.handleDaemonCommand(SUPPORTED_COMMANDS, args),
+		'args': '[--stop|--status]'
+	},
+	
+	'engines': {
+		'description': 'List the detected Unreal Engine installations (the installation used by other commands is marked with *), or manage the directories that are searched for them',
+		'action': lambda m, args: displayEngines(m, args),
+		'args': '[--refresh] [--add-search-root DIR] [--remove-search-root DIR]'
+	},
+	
 	'root': {
 		'description': 'Print the path to the root directory of the Unreal Engine',
 		'action': lambda m, args: print(m.getEngineRoot()),
@@ -52,7 +76,7 @@ SUPPORTED_COMMANDS = {
 	'build-target': {
 		'description': 'Build the specified target using UBT',
 		'action': lambda m, args: m.buildTarget(args.pop(0), args.pop(0) if (len(args) > 0) else 'Development', args),
-		'args': '<TARGET> [CONFIGURATION]'
+		'args': '<TARGET>[,TARGET...] [CONFIGURATION[,CONFIGURATION...]]'
 	},
 	
 	'run': {
@@ -74,25 +98,31 @@ SUPPORTED_COMMANDS = {
 	'build': {
 		'description': 'Build the Editor modules for the Unreal project or plugin',
 		'action': lambda m, args: m.buildDescriptor(os.getcwd(), args.pop(0) if (len(args) > 0 and args[0].startswith('-') == False) else 'Development', args.pop(0) if (len(args) > 0 and args[0].startswith('-') == False) else 'Editor', args),
-		'args': '[CONFIGURATION] [TARGET]'
+		'args': '[CONFIGURATION[,CONFIGURATION...]] [TARGET[,TARGET...]]'
+	},
+	
+	'build-all': {
+		'description': 'Build the Editor modules for the Unreal projects and plugins in multiple directories concurrently',
+		'action': lambda m, args: handleBuildAllCommand(m, args),
+		'args': '[--manifest FILE] [--configs CONFIG1,CONFIG2] [--targets TARGET1,TARGET2] [--jobs N] [DIR1 DIR2 DIRN] [-- EXTRA UBT ARGS]'
 	},
 	
 	'clean': {
 		'description': 'Clean build artifacts for the Unreal project or plugin',
-		'action': lambda m, args: m.cleanDescriptor(os.getcwd()),
-		'args': None
+		'action': lambda m, args: m.cleanDescriptor(os.getcwd(), '--dry-run' in args, '--background' in args),
+		'args': '[--dry-run] [--background]'
 	},
 	
 	'test': {
 		'description': 'Run automation tests for the Unreal project',
 		'action': lambda m, args: m.automationTests(os.getcwd(), args),
-		'args': '[--withrhi] [--list] [--all] [--filter FILTER] TEST1 TEST2 TESTN [-- EXTRA ARGS]'
+		'args': '[--withrhi] [--list] [--refresh] [--all] [--filter FILTER] [--fail-fast] [--shards N] [--junit FILE] [--json FILE] TEST1 TEST2 TESTN [-- EXTRA ARGS]'
 	},
 	
 	'package': {
 		'description': 'Package a build of the Unreal project or plugin in the current directory, storing the result in a subdirectory named "dist". Default configuration for projects is Shipping.',
 		'action': lambda m, args: m.packageDescriptor(os.getcwd(), args),
-		'args': '[PROJECT CONFIGURATION] [EXTRA UAT ARGS]'
+		'args': '[PROJECT CONFIGURATION] [--full] [--platforms PLATFORM1,PLATFORM2 [--jobs N]] [EXTRA UAT ARGS]'
 	},
 	
 	'libs': {
@@ -149,17 +179,17 @@ COMMAND_GROUPINGS = [
 	{
 		'name': 'Configuration-related commands',
 		'description': 'These commands control the configuration of ue4cli:',
-		'commands': ['setroot', 'clearroot', 'clearcache']
+		'commands': ['setroot', 'clearroot', 'clearcache', 'cache', 'daemon']
 	},
 	{
 		'name': 'Engine-related commands',
 		'description': 'These commands relate to the Unreal Engine itself:',
-		'commands': ['root', 'version', 'editor', 'build-target']
+		'commands': ['engines', 'root', 'version', 'editor', 'build-target']
 	},
 	{
 		'name': 'Descriptor-related commands',
 		'description': 'These commands relate to an individual Unreal project or plugin, and will look\nfor a .uproject or .uplugin file located in the current working directory\n(Note that some commands only support projects, not plugins):',
-		'commands': ['run', 'gen', 'build', 'clean', 'test', 'package']
+		'commands': ['run', 'gen', 'build', 'build-all', 'clean', 'test', 'package']
 	},
 	{
 		'name': 'Library-related commands',
@@ -178,9 +208,23 @@ COMMAND_GROUPINGS = [
 	}
 ]
 
+class LazyManager(object):
+	"""
+	Defers the creation of the Unreal manager instance until a command first uses it
+	"""
+	
+	def __init__(self, engine=None):
+		self._engine = engine
+		self._manager = None
+	
+	def __getattr__(self, name):
+		if self._manager is None:
+			self._manager = UnrealManagerFactory.create(EngineRegistry.resolve(self._engine) if self._engine is not None else None)
+		return getattr(self._manager, name)
+
 def displayHelp():
 	print('Usage:')
-	print(os.path.basename(sys.argv[0]) + ' COMMAND [ARGS]')
+	print(os.path.basename(sys.argv[0]) + ' [--engine VERSION|ROOTDIR] COMMAND [ARGS]')
 	for group in COMMAND_GROUPINGS:
 		print()
 		print(group['name'])
@@ -199,23 +243,162 @@ def displayHelp():
 				print(commandStr)
 		print()
 
+def displayEngines(manager, args):
+
+	# Apply any changes to the search roots, rescanning them if they were modified
+	refresh = '--refresh' in args
+	modified = False
+	for option, update in [('--add-search-root', EngineRegistry.addSearchRoot), ('--remove-search-root', EngineRegistry.removeSearchRoot)]:
+		while option in args:
+			index = args.index(option)
+			if index + 1 >= len(args):
+				raise UnrealManagerException('the {} option requires a directory'.format(option))
+			update(args[index + 1])
+			del args[index:index + 2]
+			modified = True
+	
+	# Changes to the configured search roots have no effect while they are overridden by the environment
+	if modified == True and 'UE4CLI_ENGINE_SEARCH_ROOTS' in os.environ:
+		Utility.printStderr('Warning: the configured search roots are ignored while the UE4CLI_ENGINE_SEARCH_ROOTS environment variable is set')
+	refresh = refresh or modified
+	
+	# Determine which engine installation other commands would use
+	try:
+		current = os.path.realpath(manager.getEngineRoot())
+	except UnrealManagerException:
+		current = None
+	
+	engines = EngineRegistry.listEngines(refresh)
+	if len(engines) == 0:
+		print('No Unreal Engine installations were found under the search roots: ' + ', '.join(EngineRegistry.getSearchRoots()))
+	for engine in engines:
+		print('{} {:<10} {:<10} {:<9} {}'.format(
+			'*' if engine['root'] == current else ' ',
+			engine['version'],
+			engine['changelist'],
+			'installed' if engine['installedBuild'] == True else 'source',
+			engine['root']
+		))
+
+def extractOptionValues(args, option):
+
+	# Values may be comma-separated and/or space-separated, and extend until the next option
+	if option not in args:
+		return None
+	index = args.index(option)
+	end = index + 1
+	while end < len(args) and args[end].startswith('--') == False:
+		end += 1
+	values = [value for arg in args[index + 1:end] for value in arg.split(',') if value != '']
+	del args[index:end]
+	if len(values) == 0:
+		raise UnrealManagerException('the {} option requires a value'.format(option))
+	return values
+
+def handleBuildAllCommand(manager, args):
+
+	# Gather any additional arguments to pass directly to UBT
+	extraArgs = []
+	if '--' in args:
+		delimIndex = args.index('--')
+		extraArgs = args[delimIndex+1:]
+		args = args[:delimIndex]
+	
+	# Directories can be listed in a manifest file (one per line, relative to the manifest) as well as on the command line
+	dirs = []
+	manifest = extractOptionValues(args, '--manifest')
+	if manifest is not None:
+		manifestDir = os.path.dirname(os.path.abspath(manifest[0]))
+		for line in Utility.readFile(manifest[0]).splitlines():
+			if line.strip() != '' and line.strip().startswith('#') == False:
+				dirs.append(os.path.join(manifestDir, line.strip()))
+	
+	configurations = extractOptionValues(args, '--configs') or ['Development']
+	targets = extractOptionValues(args, '--targets') or ['Editor']
+	jobs = extractOptionValues(args, '--jobs')
+	try:
+		jobs = int(jobs[0]) if jobs is not None else None
+	except ValueError:
+		raise UnrealManagerException('the --jobs option requires an integer value')
+	
+	dirs.extend(args)
+	if len(dirs) == 0:
+		raise UnrealManagerException('at least one directory or a manifest file must be specified')
+	manager.buildDescriptors(dirs, ','.join(configurations), ','.join(targets), extraArgs, jobs)
+
+def handleCacheCommand(manager, args):
+	subcommand = args.pop(0) if len(args) > 0 else None
+	if subcommand == 'warm':
+		configurations = extractOptionValues(args, '--configs') or ['Development']
+		platforms = extractOptionValues(args, '--platforms')
+		jobs = extractOptionValues(args, '--jobs')
+		try:
+			jobs = int(jobs[0]) if jobs is not None else None
+		except ValueError:
+			raise UnrealManagerException('the --jobs option requires an integer value')
+		manager.warmLibraryCache(configurations, platforms, jobs)
+	elif subcommand == 'list':
+		for entry in sorted(CachedDataManager.listCacheEntries(), key = lambda entry: entry['file']):
+			print('{} {:<56} {:>10.1f} KiB'.format(
+				entry.get('engineVersionHash', '')[:12],
+				'-'.join([entry.get('name', '')] + [str(q) for q in entry.get('qualifiers', [])]),
+				entry['size'] / 1024
+			))
+	else:
+		raise UnrealManagerException('the cache command requires a subcommand of either "warm" or "list"')
+
+def parseGlobalOptions(argv):
+
+	# The engine can be selected via the `--engine` option (which must precede the command) or the UE4CLI_ENGINE environment variable
+	engine = os.environ.get('UE4CLI_ENGINE', None) or None
+	while len(argv) > 0 and (argv[0] == '--engine' or argv[0].startswith('--engine=')):
+		if argv[0] == '--engine':
+			if len(argv) < 2:
+				raise UnrealManagerException('the --engine option requires an engine version or root directory')
+			engine = argv[1]
+			argv = argv[2:]
+		else:
+			engine = argv[0][len('--engine='):]
+			argv = argv[1:]
+	
+	# Engine root directories are made absolute so that they can be resolved by processes with a different working directory
+	if engine is not None and os.path.exists(EngineSnapshot.versionFileForRoot(engine)):
+		engine = os.path.abspath(engine)
+	
+	return engine, argv
+
 def main():
 	try:
 		
-		# Perform plugin detection and register our detected plugins
-		plugins = PluginManager.getPlugins()
-		for command in plugins:
-			details = plugins[command]
-			if command not in SUPPORTED_COMMANDS:
-				SUPPORTED_COMMANDS[command] = details
-				COMMAND_GROUPINGS[-1]['commands'].append(command)
+		# Extract any global options, the specified command and any trailing arguments
+		engine, argv = parseGlobalOptions(sys.argv[1:])
+		command = 'help' if len(argv) < 1 else argv[0].strip('-')
+		args = argv[1:]
+		
+		# If the daemon is running and can answer the command then use its response instead of running the command ourselves
+		if command in DAEMON_COMMANDS:
+			response = DaemonManager.query(command, args, engine)
+			if response is not None:
+				sys.stdout.write(response['stdout'])
+				sys.stderr.write(response['stderr'])
+				sys.exit(response['returncode'])
 		
-		# Create the Unreal manager instance for the current platform
-		manager = UnrealManagerFactory.create()
+		# Register our detected plugins, deferring loading each plugin until its command is invoked
+		# (Plugins cannot replace built-in commands, so we only need the plugin index for other commands or to display help)
+		if command not in SUPPORTED_COMMANDS or command == 'help':
+			plugins = PluginManager.getPluginIndex()
+			for name in plugins:
+				details = plugins[name]
+				if name not in SUPPORTED_COMMANDS:
+					SUPPORTED_COMMANDS[name] = {
+						'description': details['description'],
+						'action': lambda m, args, name=name: PluginManager.loadPlugin(name)['action'](m, args),
+						'args': details['args']
+					}
+					COMMAND_GROUPINGS[-1]['commands'].append(name)
 		
-		# Extract the specified command and any trailing arguments
-		command = 'help' if len(sys.argv) < 2 else sys.argv[1].strip('-')
-		args = sys.argv[2:]
+		# Create the Unreal manager instance for the current platform (only constructed if the command uses it)
+		manager = LazyManager(engine)
 		
 		# If the specified command is supported, invoke it
 		if command in SUPPORTED_COMMANDS: